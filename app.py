@@ -1,7 +1,17 @@
-import streamlit as st
-import pandas as pd
-import re
 import io
+import os
+import sys
+import json
+import functools
+import threading
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+import stats_engine as engine
+import profiling
+from profiling import stage
+from stats_engine import Filters
 
 # -----------------------------------------------------------------------------
 # 1. 페이지 설정 및 CSS 스타일링
@@ -11,6 +21,39 @@ st.set_page_config(
     layout="wide"
 )
 
+# 진단 모드: 주소 뒤에 ?debug=1 을 붙이거나 환경변수 SSU_PROFILE=1 로 실행
+# 메모리 측정(tracemalloc)은 프로세스 전체에 부담을 주므로 SSU_PROFILE=1로 실행한 경우에만 함
+PROFILE_HISTORY = 30  # 최근 실행 기록 보관 개수
+trace_memory = os.environ.get("SSU_PROFILE") == "1"
+profile_enabled = st.query_params.get("debug") == "1" or trace_memory
+profiler = profiling.Profiler(trace_memory) if profile_enabled else None
+profile_token = profiling.activate(profiler)
+
+def end_run(rerun=False):
+    """측정을 정리한 뒤 실행 중단 (st.stop/st.rerun은 예외로 끝나서 맨 아래 진단 패널까지 가지 않음)"""
+    profiling.deactivate(profile_token)
+    if rerun:
+        st.rerun()
+    st.stop()
+
+def profile_history():
+    """세션별 최근 실행 측정 기록 (전체 실행과 부분 재실행을 같이 보관)"""
+    return st.session_state.setdefault('profile_history', deque(maxlen=PROFILE_HISTORY))
+
+def stage_table(run):
+    """단계별 처리 시간 / 최대 메모리 표"""
+    stage_rows = [
+        {
+            '단계': "　" * r['depth'] + r['stage'],
+            '시간(ms)': r['ms'],
+            '최대 메모리(KB)': r['peak_kb'],
+        }
+        for r in run.records
+    ]
+    st.dataframe(stage_rows, use_container_width=True, hide_index=True)
+    if not run.trace_memory:
+        st.caption("최대 메모리는 SSU_PROFILE=1로 실행했을 때만 측정합니다. (다른 실행이 측정 중일 때도 제외)")
+
 # 커스텀 CSS
 st.markdown("""
     <style>
@@ -113,52 +156,96 @@ st.markdown("""
 # 2. 데이터 처리 및 세션 관리
 # -----------------------------------------------------------------------------
 
-# 초기 데이터 로드
-if 'player_csv' not in st.session_state:
-    try:
-        with open("player_records.csv", "r", encoding="utf-8") as f:
-            st.session_state['player_csv'] = f.read()
-    except FileNotFoundError:
-        st.session_state['player_csv'] = ""
+# 전처리 결과 스냅샷 저장 위치 (stats_engine.save_snapshot 참고)
+SNAPSHOT_DIR = "snapshot"
 
-if 'match_csv' not in st.session_state:
-    try:
-        with open("match_records.csv", "r", encoding="utf-8") as f:
-            st.session_state['match_csv'] = f.read()
-    except FileNotFoundError:
-        st.session_state['match_csv'] = ""
+# 브라우저(stlite)에서는 build_bundle.py로 미리 만든 번들을 먼저 읽음 (SSU_BUNDLE=1이면 로컬에서도 사용)
+BUNDLE_PATH = "bundle.npz"
+use_bundle = sys.platform == "emscripten" or os.environ.get("SSU_BUNDLE") == "1"
 
-def preprocess_data(df_p, df_m):
-    """데이터 전처리 공통 함수"""
-    # 날짜를 실제 날짜 형식(datetime)으로 변환
-    df_p['날짜'] = pd.to_datetime(df_p['날짜'], errors='coerce')
-    df_m['날짜'] = pd.to_datetime(df_m['날짜'], errors='coerce')
-    
-    df_p['연도'] = df_p['연도'].astype(int)
-    df_m['연도'] = df_m['연도'].astype(int)
-    
-    numeric_cols = ['득점', '도움', '실점', '경고', 'MOM', '출전시간']
-    for col in numeric_cols:
-        if col in df_p.columns:
-            df_p[col] = pd.to_numeric(df_p[col], errors='coerce').fillna(0)
-            
-    return df_p, df_m
-
-def parse_match_result(score_str):
-    """스코어 문자열 파싱"""
-    if pd.isna(score_str) or score_str == '-':
-        return None, 0, 0
-    clean_score = re.sub(r'\(.*?\)', '', str(score_str))
+def read_csv_file(path):
     try:
-        parts = clean_score.split(':')
-        home = int(parts[0])
-        away = int(parts[1])
-        result = '무'
-        if home > away: result = '승'
-        elif home < away: result = '패'
-        return result, home, away
-    except:
-        return None, 0, 0
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+def read_csv_files(player_path, match_path):
+    return read_csv_file(player_path), read_csv_file(match_path)
+
+# 현재 데이터 버전 (프로세스 전체에서 하나, 모든 세션이 공유)
+# 세션에는 필터 선택값과 아직 반영하지 않은 입력창 내용만 남깁니다.
+# 화면에서 공개한 버전은 스냅샷 폴더에 기록해두고 재시작할 때 먼저 읽으므로 (engine.save_current 참고),
+# 저장소의 CSV 파일은 기록이 없을 때(처음 시작, 기록을 지운 경우) 불러오는 용도로만 씁니다.
+# CSV 원문은 메모리에 들고 있지 않고 편집창을 열거나 스냅샷이 없을 때만 csv_text()로 읽습니다.
+@st.cache_resource
+def shared_store():
+    """{'lock', 'current': (버전, csv_text), 'saved'}, 버전은 CSV 내용 해시 (데이터가 없으면 None)
+
+    csv_text()는 그 버전의 (player_csv, match_csv)를 반환합니다.
+    """
+    current = engine.load_current(SNAPSHOT_DIR)
+    if current is not None:
+        version, player_path, match_path = current
+    else:
+        player_path, match_path = "player_records.csv", "match_records.csv"
+        player_csv, match_csv = read_csv_files(player_path, match_path)
+        version = engine.csv_digest(player_csv, match_csv) if player_csv and match_csv else None
+    csv_text = functools.partial(read_csv_files, player_path, match_path)
+    return {'lock': threading.Lock(), 'current': (version, csv_text), 'saved': True}
+
+def publish_version(store, expected, version, player_csv, match_csv):
+    """expected 버전을 보고 편집한 경우에만 새 버전으로 교체 (다른 세션이 먼저 바꿨으면 False)
+
+    'current' 튜플 하나만 바꾸므로 다른 세션은 이전 버전이나 새 버전 중 하나만 보게 됩니다.
+    """
+    with store['lock']:
+        if store['current'][0] != expected:
+            return False
+        # 재시작해도 이 버전으로 시작하도록 기록 (잠금 안에서 써서 마지막으로 공개한 버전과 항상 같음)
+        paths = engine.save_current(SNAPSHOT_DIR, version, player_csv, match_csv)
+        if paths is not None:
+            csv_text = functools.partial(read_csv_files, *paths)
+        else:
+            # 저장하지 못하면 프로세스가 끝날 때까지 메모리에 보관
+            csv_text = lambda: (player_csv, match_csv)
+        store['current'] = (version, csv_text)
+        store['saved'] = paths is not None
+        return True
+
+# 버전별 Dataset은 복사하지 않고 모든 세션이 같은 객체를 참조 (최근 8개 버전만 유지)
+# 조회 API는 프레임을 수정하지 않고 새 프레임을 반환하므로 그대로 공유해도 안전합니다.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_data(data_key, _csv_text, _base=None):
+    """CSV 파싱 + 전처리 + 사전 집계 (data_key가 같으면 캐시된 결과 재사용)
+
+    브라우저에서는 같은 데이터로 만든 번들이 있으면 번들을, 아니면 스냅샷을 읽고
+    둘 다 없을 때만 _csv_text()로 CSV를 읽어서 파싱합니다.
+    _base에 이전 버전 Dataset을 넘기면 헤더가 같을 때 바뀐 행만 파싱해서 반영합니다.
+    """
+    data = engine.load_bundle(BUNDLE_PATH, data_key) if use_bundle else None
+    if data is not None:
+        return data
+    data = engine.load_snapshot(SNAPSHOT_DIR, data_key)
+    if data is not None:
+        return data
+
+    data = engine.load_csv_text(*_csv_text(), _base)
+    engine.save_snapshot(SNAPSHOT_DIR, data_key, data)
+    return data
+
+# 필터 조합별 조회 결과 (모든 세션이 공유, 새 버전을 공개하면 이전 버전 결과는 제거)
+@st.cache_resource
+def shared_query_cache():
+    return engine.QueryCache()
+
+def query(fn, data, filters, *args):
+    """조회 API 호출 (같은 데이터 버전/필터/인자면 캐시된 결과 재사용, 결과는 수정하지 않음)"""
+    return query_cache.get(version, fn, data, filters, *args)
+
+store = shared_store()
+query_cache = shared_query_cache()
+version, csv_text = store['current']
 
 # -----------------------------------------------------------------------------
 # 3. 헤더 구성 및 데이터 입력창 (Expander 사용)
@@ -174,47 +261,113 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# 입력창 편집본은 편집을 켠 세션에만 보관 (edit_version: 편집을 시작한 데이터 버전)
+# 편집하지 않는 세션은 CSV 원문을 따로 들고 있지 않고 공유 저장소의 현재 버전만 참조합니다.
+# 업데이트에 성공하면 편집을 닫음 (입력창은 위젯이 그려진 뒤에는 바꿀 수 없으므로 다음 실행 시작 때)
+if st.session_state.pop('close_editor', False):
+    st.session_state['editing'] = False
+
 # 데이터 등록/수정 섹션
 with st.expander("데이터 일괄 등록/수정 (클릭하여 열기)", expanded=False):
-    st.info("엑셀이나 CSV 파일의 내용을 복사해서 아래 입력창에 붙여넣으세요. (첫 줄 헤더 포함)")
-    
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown("##### 1. 경기기록 (Match Data)")
-        st.caption("필수 컬럼: 연도, 대회명, 라운드, 날짜, 상대팀, 스코어...")
-        new_match_csv = st.text_area(
-            "match_input", 
-            value=st.session_state.match_csv, 
-            height=200, 
-            label_visibility="collapsed"
-        )
-    with c2:
-        st.markdown("##### 2. 선수기록 (Player Data)")
-        st.caption("필수 컬럼: 연도, 대회명, 라운드, 날짜, 상대팀, 선수명, 선발/교체...")
-        new_player_csv = st.text_area(
-            "player_input", 
-            value=st.session_state.player_csv, 
-            height=200, 
-            label_visibility="collapsed"
-        )
-    
-    if st.button("데이터 업데이트", type="primary"):
-        st.session_state.match_csv = new_match_csv
-        st.session_state.player_csv = new_player_csv
-        st.rerun()
+    editing = st.toggle("편집", key='editing', help="끄면 반영하지 않은 입력 내용은 지워집니다.")
+    if not editing:
+        for key in ('player_input', 'match_input'):
+            st.session_state.pop(key, None)
+        st.caption("편집을 켜면 현재 데이터를 입력창에 불러옵니다.")
+    else:
+        # 편집을 켰을 때, 또는 고치지 않은 상태에서 새 버전이 공개됐을 때만 현재 데이터로 채움
+        if 'player_input' not in st.session_state or (
+            st.session_state['edit_version'] != version
+            and engine.csv_digest(st.session_state['player_input'], st.session_state['match_input']) == st.session_state['edit_version']
+        ):
+            st.session_state['edit_version'] = version
+            st.session_state['player_input'], st.session_state['match_input'] = csv_text()
+
+        st.info("엑셀이나 CSV 파일의 내용을 복사해서 아래 입력창에 붙여넣으세요. (첫 줄 헤더 포함)")
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("##### 1. 경기기록 (Match Data)")
+            st.caption("필수 컬럼: 연도, 대회명, 라운드, 날짜, 상대팀, 스코어...")
+            new_match_csv = st.text_area(
+                "match_input", 
+                key="match_input", 
+                height=200, 
+                label_visibility="collapsed"
+            )
+        with c2:
+            st.markdown("##### 2. 선수기록 (Player Data)")
+            st.caption("필수 컬럼: 연도, 대회명, 라운드, 날짜, 상대팀, 선수명, 선발/교체...")
+            new_player_csv = st.text_area(
+                "player_input", 
+                key="player_input", 
+                height=200, 
+                label_visibility="collapsed"
+            )
+
+        incremental = st.checkbox("변경된 행만 반영 (증분 업데이트)", value=True)
+        if st.button("데이터 업데이트", type="primary"):
+            new_version = engine.csv_digest(new_player_csv, new_match_csv)
+            try:
+                # 증분 업데이트: 현재 버전과 비교해서 바뀐 행만 파싱
+                base = load_data(version, csv_text) if incremental and version else None
+                with stage("데이터 로드"):
+                    load_data(new_version, lambda: (new_player_csv, new_match_csv), base)
+            except Exception as e:
+                # 형식이 잘못된 데이터는 공개하지 않고 입력창 내용은 그대로 유지
+                st.error(f"데이터 형식 오류: {e}")
+            else:
+                if publish_version(store, st.session_state['edit_version'], new_version, new_player_csv, new_match_csv):
+                    query_cache.invalidate(keep=new_version)
+                    st.session_state['edit_version'] = new_version
+                    st.session_state['just_updated'] = incremental
+                    st.session_state['close_editor'] = True
+                    end_run(rerun=True)
+                # 다시 누르면 현재 버전에 덮어쓰도록 기준 버전만 갱신 (입력창 내용은 유지)
+                st.session_state['edit_version'] = version
+                st.error("다른 사용자가 먼저 데이터를 업데이트했습니다. 입력 내용을 확인한 뒤 다시 누르면 최신 버전에 덮어씁니다.")
+
+    # 득점자/도움자 대조 결과 (데이터를 읽은 뒤에 채움)
+    check_box = st.container()
 
 # 데이터 로드
-if st.session_state.player_csv and st.session_state.match_csv:
-    try:
-        df_p_raw = pd.read_csv(io.StringIO(st.session_state.player_csv))
-        df_m_raw = pd.read_csv(io.StringIO(st.session_state.match_csv))
-        df_player, df_match = preprocess_data(df_p_raw, df_m_raw)
-    except Exception as e:
-        st.error(f"데이터 형식 오류: {e}")
-        st.stop()
-else:
+if version is None:
     st.warning("데이터가 없습니다. 위 입력창에서 데이터를 입력해주세요.")
-    st.stop()
+    end_run()
+
+try:
+    with stage("데이터 로드"):
+        data = load_data(version, csv_text)
+except Exception as e:
+    st.error(f"데이터 형식 오류: {e}")
+    end_run()
+
+# 방금 증분 업데이트한 경우 변경 내역 요약 표시
+if st.session_state.pop('just_updated', False) and data.changes:
+    summary = " / ".join(
+        f"{name} 추가 {c['추가']} · 수정 {c['수정']} · 삭제 {c['삭제']}"
+        for name, c in data.changes.items()
+    )
+    st.success(f"데이터 업데이트 완료 — {summary}")
+    if not store['saved']:
+        st.warning("업데이트한 데이터를 저장하지 못했습니다. 서버를 다시 시작하면 이전 데이터로 돌아갑니다.")
+elif st.session_state.get('data_version') not in (None, version):
+    st.info("다른 사용자가 데이터를 업데이트해서 최신 버전으로 전환했습니다.")
+st.session_state['data_version'] = version
+
+# 불러올 때 검사한 입력 데이터 문제 (형식이 잘못된 값, 경기기록과 맞지 않는 기록)
+if len(data.validation):
+    with check_box:
+        st.warning(f"입력 데이터에서 확인이 필요한 기록이 {len(data.validation)}건 있습니다. (형식이 잘못된 날짜는 빈 값, 숫자는 0으로 처리)")
+        st.dataframe(data.validation.drop(columns='row_hash'), use_container_width=True, hide_index=True)
+
+# 경기기록 득점자/도움자와 선수기록 득점/도움이 다른 경기는 입력창 아래에 표시
+if len(data.goal_mismatches):
+    with check_box:
+        st.warning(f"득점자/도움자와 선수기록이 다른 기록이 {len(data.goal_mismatches)}건 있습니다.")
+        mismatches = data.goal_mismatches.copy()
+        mismatches['날짜'] = mismatches['날짜'].dt.strftime('%Y-%m-%d')
+        st.dataframe(mismatches, use_container_width=True, hide_index=True)
 
 st.write("") # 여백
 
@@ -231,21 +384,18 @@ def reset_filters():
 
 f_col1, f_col2, f_col3, f_col4, f_col5 = st.columns([1.5, 1.5, 1.5, 1.5, 0.5])
 
-all_years = sorted(df_player['연도'].unique(), reverse=True)
-all_tournaments = sorted(df_player['대회명'].unique())
-all_opponents = sorted(df_player['상대팀'].unique())
+with stage("필터 옵션"):
+    options = engine.filter_options(data)
 
 with f_col1:
-    selected_years = st.multiselect("연도", all_years, key='year', format_func=lambda x: str(x))
+    selected_years = st.multiselect("연도", options['years'], key='year', format_func=lambda x: str(x))
 with f_col2:
-    selected_tournaments = st.multiselect("대회명", all_tournaments, key='tour')
+    selected_tournaments = st.multiselect("대회명", options['tournaments'], key='tour')
 with f_col3:
-    selected_opponents = st.multiselect("상대팀", all_opponents, key='opp')
+    selected_opponents = st.multiselect("상대팀", options['opponents'], key='opp')
 
-temp_player_df = df_player.copy()
-if selected_years:
-    temp_player_df = temp_player_df[temp_player_df['연도'].isin(selected_years)]
-available_players = sorted(temp_player_df['선수명'].unique())
+with stage("필터 옵션 (선수)"):
+    available_players = engine.filter_options(data, selected_years)['players'] if selected_years else options['players']
 
 with f_col4:
     selected_players = st.multiselect("선수명", available_players, key='player')
@@ -257,27 +407,21 @@ with f_col5:
 # -----------------------------------------------------------------------------
 # 5. 데이터 필터링 적용
 # -----------------------------------------------------------------------------
-filtered_p = df_player.copy()
-
-if selected_years:
-    filtered_p = filtered_p[filtered_p['연도'].isin(selected_years)]
-if selected_tournaments:
-    filtered_p = filtered_p[filtered_p['대회명'].isin(selected_tournaments)]
-if selected_opponents:
-    filtered_p = filtered_p[filtered_p['상대팀'].isin(selected_opponents)]
-
-if selected_players:
-    filtered_p_match_subset = filtered_p[filtered_p['선수명'].isin(selected_players)]
-else:
-    filtered_p_match_subset = filtered_p
-
-relevant_matches = filtered_p_match_subset[['날짜', '상대팀']].drop_duplicates()
-final_match_df = df_match.merge(relevant_matches, on=['날짜', '상대팀'], how='inner')
+filters = Filters(
+    years=tuple(selected_years),
+    tournaments=tuple(selected_tournaments),
+    opponents=tuple(selected_opponents),
+    players=tuple(selected_players),
+)
 
 # -----------------------------------------------------------------------------
 # 6. 메인 콘텐츠 (카드형 디자인)
 # -----------------------------------------------------------------------------
 
+def format_date(value):
+    """날짜 한 개 표시 (YYYY-MM-DD), 날짜를 읽지 못한 경우(NaT)는 빈 문자열"""
+    return "" if pd.isna(value) else value.strftime('%Y-%m-%d')
+
 # HTML로 커스텀 메트릭을 그리는 함수
 def render_metric(label, value_html):
     st.markdown(f"""
@@ -287,127 +431,251 @@ def render_metric(label, value_html):
     </div>
     """, unsafe_allow_html=True)
 
+# 부분 재실행 단위 (Streamlit 버전에 따라 이름이 다르고, 없으면 전체 재실행)
+st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+def fragment(fn):
+    """부분 재실행 단위, 진단 모드면 이 영역만 다시 실행한 경우도 따로 측정해서 기록에 추가
+
+    부분 재실행 때는 맨 위의 측정 시작/맨 아래 진단 패널이 실행되지 않으므로 영역 안에서 측정 결과를 보여줍니다.
+    전체 실행 중에 호출되면 전체 실행의 측정에 포함됩니다.
+    """
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        if not profile_enabled or profiling.current() is not None:
+            return fn(*args, **kwargs)
+        part = profiling.Profiler(trace_memory, scope=fn.__name__)
+        token = profiling.activate(part)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiling.deactivate(token)
+        part.finish()
+        profile_history().append(part.to_dict())
+        with st.expander(f"진단: 이 영역만 다시 실행 {part.total_ms:.0f}ms", expanded=False):
+            stage_table(part)
+        return result
+    return st_fragment(run)
+
+# Match Log 내보내기 컬럼 (화면과 달리 여러 선수를 구분하고 도움/실점을 모두 포함)
+EXPORT_LOG_COLS = ['날짜', '대회명', '라운드', '상대팀', '선수명', '선발/교체', '출전시간', '득점', '도움', '실점', 'MOM', '경고', '비고']
+
+def export_buttons(df, name, label, columns=None, index=False):
+    """표 내보내기 (형식을 고르고 '파일 만들기'를 눌렀을 때만 조회 결과로 파일 생성)
+
+    화면용으로 바꾼 표가 아니라 캐시된 조회 결과를 조각 단위로 쓰므로 날짜/숫자는 원래 값 그대로입니다.
+    """
+    ec1, ec2, ec3 = st.columns([2, 1, 1])
+    fmt = ec1.radio(
+        f"{label} 내보내기 형식", engine.export_formats(), key=f"{name}_export_fmt",
+        horizontal=True, label_visibility="collapsed",
+    )
+    if ec2.button("파일 만들기", key=f"{name}_export", use_container_width=True):
+        ext, mime, _ = engine.EXPORT_FORMATS[fmt]
+        with stage(f"{label} 내보내기"):
+            out = engine.export_table(df, fmt, io.BytesIO(), columns, index, sheet_name=label)
+        ec3.download_button(
+            "다운로드", out.getvalue(), file_name=f"ssu_{name}.{ext}", mime=mime,
+            key=f"{name}_download", use_container_width=True,
+        )
+
+def render_match_list(data, filters):
+    """전체 경기 목록"""
+    # 날짜 내림차순 정렬
+    with stage("경기 목록"):
+        final_match_df = query(engine.match_list, data, filters)
+    
+    view_cols = ['대회명', '라운드', '날짜', '상대팀', '스코어', '득점자', 'MOM']
+    view_cols = [c for c in view_cols if c in final_match_df.columns]
+    
+    display_match = final_match_df[view_cols].copy()
+    # 출력할 때만 문자열로 변환 (YYYY-MM-DD)
+    display_match['날짜'] = display_match['날짜'].dt.strftime('%Y-%m-%d')
+    
+    with stage("경기 목록 표시"):
+        st.dataframe(display_match.fillna(""), use_container_width=True, hide_index=True)
+    export_buttons(final_match_df, "match_list", "경기 목록", view_cols)
+
+def render_ranking(data, filters):
+    """선수 랭킹 (정렬 버튼 포함)"""
+    # 정렬 상태 관리를 위한 세션 초기화
+    if 'rank_sort_key' not in st.session_state:
+        st.session_state['rank_sort_key'] = '득점'
+
+    # 랭킹 정렬 버튼 (4개)
+    rb1, rb2, rb3, rb4 = st.columns(4)
+    if rb1.button("득점", use_container_width=True):
+        st.session_state['rank_sort_key'] = '득점'
+    if rb2.button("MOM 횟수", use_container_width=True):
+        st.session_state['rank_sort_key'] = 'MOM'
+    if rb3.button("경기 수", use_container_width=True):
+        st.session_state['rank_sort_key'] = '경기수'
+    if rb4.button("출전 시간", use_container_width=True):
+        st.session_state['rank_sort_key'] = '출전시간'
+
+    # 선택된 키에 따라 정렬 (선택한 정렬 기준 컬럼이 앞쪽, 순위는 1부터)
+    with stage("랭킹"):
+        rank_df = query(engine.ranking, data, filters, st.session_state['rank_sort_key'])
+    
+    # 데이터프레임 표시
+    with stage("랭킹 표시"):
+        st.dataframe(
+            rank_df, 
+            use_container_width=True,
+            column_config={
+                "득점": st.column_config.NumberColumn(format="%d"),
+                "경기수": st.column_config.NumberColumn(format="%d"),
+                "출전시간": st.column_config.NumberColumn(format="%d"),
+                "도움": st.column_config.NumberColumn(format="%d"),
+                "MOM": st.column_config.NumberColumn(format="%d"),
+            }
+        )
+    export_buttons(rank_df.rename_axis('순위'), "ranking", "선수 랭킹", index=True)
+
+def render_team_form(data, filters):
+    """최근 폼, 무패/연속 득점 기록, 누적 득실점 추이"""
+    with stage("경기 흐름"):
+        streaks = query(engine.team_streaks, data, filters)
+        form = query(engine.team_form, data, filters)
+    if streaks is None:
+        st.warning("선택된 조건의 기록이 없습니다.")
+        return
+
+    n = engine.FORM_WINDOW
+    colors = {'승': 'val-blue', '패': 'val-red'}
+    recent = " ".join(f"<span class='{colors.get(r, '')}'>{r}</span>" for r in streaks['최근결과'])
+    fc1, fc2, fc3, fc4 = st.columns(4)
+    with fc1:
+        render_metric(f"최근 {n}경기", recent)
+    with fc2:
+        render_metric(f"최근 {n}경기 승점", f"{streaks['최근승점']}<span class='metric-unit'>점</span>")
+    with fc3:
+        render_metric("무패 (현재 / 최장)", f"{streaks['현재무패']} / {streaks['최장무패']}<span class='metric-unit'>경기</span>")
+    with fc4:
+        render_metric("연속 득점 (현재 / 최장)", f"{streaks['현재득점연속']} / {streaks['최장득점연속']}<span class='metric-unit'>경기</span>")
+
+    st.write("")
+    st.line_chart(form.set_index('날짜')[['누적득점', '누적실점']])
+
+    view = form[['날짜', '대회명', '상대팀', '결과', '득점', '실점', '최근승점', '최근득점', '최근실점', '무패연속', '득점연속']].copy()
+    view['날짜'] = view['날짜'].dt.strftime('%Y-%m-%d')
+    view = view.rename(columns={
+        '최근승점': f"최근{n} 승점", '최근득점': f"최근{n} 득점", '최근실점': f"최근{n} 실점",
+    })
+    with stage("경기 흐름 표시"):
+        st.dataframe(view.iloc[::-1].fillna(""), use_container_width=True, hide_index=True)
+
+def render_opponent_profile(data, filters):
+    """상대팀별 통산 전적 (연도별, 득점 선수, 최근 경기)"""
+    overview = data.opponent_table.sort_values(['경기수', '승'], ascending=False, kind='stable')
+    options = overview.index.tolist()
+    # 상대팀 필터를 골랐으면 첫 번째 팀을 먼저 보여줌
+    default = options.index(filters.opponents[0]) if filters.opponents and filters.opponents[0] in options else 0
+    opponent = st.selectbox("상대팀", options, index=default)
+    st.caption("대회/연도 필터와 관계없이 통산 전적입니다. (승부차기 경기는 무승부로 집계)")
+
+    with stage("상대 전적"):
+        profile = engine.opponent_profile(data, opponent)
+    if profile is None:
+        st.warning("선택된 조건의 기록이 없습니다.")
+        return
+
+    rec = profile['전적']
+    hc1, hc2, hc3, hc4 = st.columns(4)
+    with hc1:
+        render_metric("전적", f"{rec['승']}<span class='metric-unit'>승</span> {rec['무']}<span class='metric-unit'>무</span> {rec['패']}<span class='metric-unit'>패</span>")
+    with hc2:
+        render_metric("득점 / 실점", f"<span class='val-blue'>{rec['득점']}</span> / <span class='val-red'>{rec['실점']}</span>")
+    with hc3:
+        render_metric("승부차기", f"{rec['승부차기승']}<span class='metric-unit'>승</span> {rec['승부차기패']}<span class='metric-unit'>패</span>")
+    with hc4:
+        if pd.isna(rec['최근날짜']):
+            render_metric("최근 경기", "-")
+        else:
+            render_metric("최근 경기", f"{rec['최근스코어']} {rec['최근결과']}<span class='metric-unit'>{format_date(rec['최근날짜'])}</span>")
+
+    st.write("")
+    oc1, oc2 = st.columns(2)
+    with oc1:
+        st.markdown("##### 연도별 전적")
+        yearly = profile['연도별'].reset_index()
+        yearly['연도'] = yearly['연도'].astype(str)
+        st.dataframe(yearly, use_container_width=True, hide_index=True)
+    with oc2:
+        st.markdown("##### 상대로 득점한 선수")
+        st.dataframe(profile['득점자'].reset_index(), use_container_width=True, hide_index=True)
+
+    st.markdown("##### 전체 상대 전적")
+    view = overview.reset_index()
+    view['최근날짜'] = view['최근날짜'].dt.strftime('%Y-%m-%d')
+    with stage("상대 전적 표시"):
+        st.dataframe(view.fillna(""), use_container_width=True, hide_index=True)
+
+@fragment
+def team_tables(data, filters):
+    """전체 경기 / 선수 랭킹 전환 영역
+
+    보기 전환이나 랭킹 정렬 버튼은 이 영역만 다시 실행하고,
+    선택된 보기의 데이터만 계산합니다 (st.tabs는 숨은 탭까지 매번 계산).
+    """
+    view = st.radio(
+        "보기", ["전체 경기", "선수 랭킹", "경기 흐름", "상대 전적"],
+        key='team_view', horizontal=True, label_visibility="collapsed",
+    )
+    if view == "전체 경기":
+        render_match_list(data, filters)
+    elif view == "선수 랭킹":
+        render_ranking(data, filters)
+    elif view == "경기 흐름":
+        render_team_form(data, filters)
+    else:
+        render_opponent_profile(data, filters)
+
+@fragment
+def player_comparison_view(data, filters):
+    """선수 x 지표 비교표와 연도별 비교 (지표를 바꾸면 이 영역만 다시 실행)"""
+    with stage("선수 비교"):
+        table = query(engine.player_comparison, data, filters)
+    per90 = {f"{col}/90": st.column_config.NumberColumn(f"{col}/90", format="%.2f") for col in engine.PER90_COLS}
+    st.dataframe(table.reset_index(), use_container_width=True, hide_index=True, column_config=per90)
+
+    metric = st.radio(
+        "연도별 비교 지표", engine.COMPARE_SUMS, key='compare_metric', horizontal=True,
+    )
+    with stage("연도별 비교"):
+        split = query(engine.player_yearly_split, data, filters, metric)
+    st.dataframe(split.reset_index(), use_container_width=True, hide_index=True)
+
 # [Case 1] 전체 선수 보기 (Team Record)
 if not selected_players:
     with st.container():
         st.markdown('<div class="data-card">', unsafe_allow_html=True)
         st.subheader("TEAM RECORDS")
         
-        wins, draws, losses = 0, 0, 0
-        team_goals, team_conceded = 0, 0
-        
-        for score in final_match_df['스코어']:
-            res, h, a = parse_match_result(score)
-            if res == '승': wins += 1
-            elif res == '무': draws += 1
-            elif res == '패': losses += 1
-            team_goals += h
-            team_conceded += a
-        
-        total_games = len(final_match_df)
+        with stage("팀 기록"):
+            summary = query(engine.team_summary, data, filters)
         
         # 최다 MOM
-        mom_stats = filtered_p.groupby('선수명')['MOM'].sum().sort_values(ascending=False)
         mom_text = "-"
-        if not mom_stats.empty and mom_stats.iloc[0] > 0:
-            top_mom_player = mom_stats.index[0]
-            top_mom_count = int(mom_stats.iloc[0])
+        if summary['최다MOM']:
+            top_mom_player, top_mom_count = summary['최다MOM']
             mom_text = f"{top_mom_player} <span class='metric-unit'>({top_mom_count}회)</span>"
 
         # 커스텀 메트릭 렌더링
         mc1, mc2, mc3, mc4 = st.columns(4)
         
         with mc1:
-            render_metric("총 경기수", f"{total_games}<span class='metric-unit'>경기</span>")
+            render_metric("총 경기수", f"{summary['경기수']}<span class='metric-unit'>경기</span>")
         with mc2:
-            render_metric("승/무/패", f"{wins}<span class='metric-unit'>승</span> {draws}<span class='metric-unit'>무</span> {losses}<span class='metric-unit'>패</span>")
+            render_metric("승/무/패", f"{summary['승']}<span class='metric-unit'>승</span> {summary['무']}<span class='metric-unit'>무</span> {summary['패']}<span class='metric-unit'>패</span>")
         with mc3:
-            render_metric("팀 득점/실점", f"<span class='val-blue'>{team_goals}</span><span class='metric-unit'></span> / <span class='val-red'>{team_conceded}</span><span class='metric-unit'></span>")
+            render_metric("팀 득점/실점", f"<span class='val-blue'>{summary['득점']}</span><span class='metric-unit'></span> / <span class='val-red'>{summary['실점']}</span><span class='metric-unit'></span>")
         with mc4:
             render_metric("최다 MOM", mom_text)
         
         st.divider()
 
-        t1, t2 = st.tabs(["전체 경기", "선수 랭킹"])
-        
-        with t1:
-            # 날짜 내림차순 정렬
-            final_match_df = final_match_df.sort_values(by='날짜', ascending=True)
-            
-            view_cols = ['대회명', '라운드', '날짜', '상대팀', '스코어', '득점자', 'MOM']
-            view_cols = [c for c in view_cols if c in final_match_df.columns]
-            
-            display_match = final_match_df[view_cols].copy()
-            # 출력할 때만 문자열로 변환 (YYYY-MM-DD)
-            display_match['날짜'] = display_match['날짜'].dt.strftime('%Y-%m-%d')
-            
-            st.dataframe(display_match.fillna(""), use_container_width=True, hide_index=True)
-            
-        with t2:
-            # 정렬 상태 관리를 위한 세션 초기화
-            if 'rank_sort_key' not in st.session_state:
-                st.session_state['rank_sort_key'] = '득점'
-
-            # 랭킹 정렬 버튼 (4개)
-            rb1, rb2, rb3, rb4 = st.columns(4)
-            if rb1.button("득점", use_container_width=True):
-                st.session_state['rank_sort_key'] = '득점'
-            if rb2.button("MOM 횟수", use_container_width=True):
-                st.session_state['rank_sort_key'] = 'MOM'
-            if rb3.button("경기 수", use_container_width=True):
-                st.session_state['rank_sort_key'] = '경기수'
-            if rb4.button("출전 시간", use_container_width=True):
-                st.session_state['rank_sort_key'] = '출전시간'
-
-            # 데이터 집계 (출전시간 추가)
-            rank_df = filtered_p.groupby('선수명').agg({
-                '득점': 'sum', 
-                '도움': 'sum', 
-                'MOM': 'sum', 
-                '출전시간': 'sum', # 분 단위 합계
-                '날짜': 'count'    # 경기수
-            }).reset_index().rename(columns={'날짜': '경기수'})
-            
-            # 선택된 키에 따라 정렬
-            sort_key = st.session_state['rank_sort_key']
-            
-            if sort_key == '득점':
-                rank_df = rank_df.sort_values(['득점', '경기수', '출전시간'], ascending=[False, False, False])
-            elif sort_key == 'MOM':
-                rank_df = rank_df.sort_values(['MOM', '득점', '경기수'], ascending=[False, False, False])
-            elif sort_key == '경기수':
-                rank_df = rank_df.sort_values(['경기수', '출전시간', '득점'], ascending=[False, False, False])
-            elif sort_key == '출전시간':
-                rank_df = rank_df.sort_values(['출전시간', '경기수', '득점'], ascending=[False, False, False])
-            
-            # 순위 인덱스 생성
-            rank_df.index = range(1, len(rank_df)+1)
-            
-            # 컬럼 순서 조정 (선택한 정렬 기준을 앞쪽으로)
-            base_cols = ['선수명']
-            if sort_key == '득점':
-                cols_order = base_cols + ['득점', '경기수', '출전시간', '도움', 'MOM']
-            elif sort_key == 'MOM':
-                cols_order = base_cols + ['MOM', '득점', '경기수', '출전시간', '도움']
-            elif sort_key == '경기수':
-                cols_order = base_cols + ['경기수', '출전시간', '득점', '도움', 'MOM']
-            elif sort_key == '출전시간':
-                cols_order = base_cols + ['출전시간', '경기수', '득점', '도움', 'MOM']
-            else:
-                cols_order = base_cols + ['득점', '경기수', '출전시간', '도움', 'MOM']
-            
-            # 데이터프레임 표시
-            st.dataframe(
-                rank_df[cols_order], 
-                use_container_width=True,
-                column_config={
-                    "득점": st.column_config.NumberColumn(format="%d"),
-                    "경기수": st.column_config.NumberColumn(format="%d"),
-                    "출전시간": st.column_config.NumberColumn(format="%d"),
-                    "도움": st.column_config.NumberColumn(format="%d"),
-                    "MOM": st.column_config.NumberColumn(format="%d"),
-                }
-            )
+        team_tables(data, filters)
         st.markdown('</div>', unsafe_allow_html=True)
 
 # [Case 2] 선수 지정 보기 (Player Stats)
@@ -418,23 +686,24 @@ else:
         st.markdown('<div class="data-card">', unsafe_allow_html=True)
         st.subheader(f"PLAYER STATS : {player_list_str}")
         
-        p_df = filtered_p[filtered_p['선수명'].isin(selected_players)]
-        is_goalkeeper = p_df['실점'].sum() > 0
+        with stage("선수 기록"):
+            p_stats = query(engine.player_summary, data, filters)
+        is_goalkeeper = p_stats['골키퍼']
         
         # 기본 스탯 계산
-        p_apps = len(p_df)
-        p_starts = len(p_df[p_df['선발/교체'] == '선발'])
-        p_subs = len(p_df[p_df['선발/교체'] == '교체'])
-        stat_val_1 = int(p_df['득점'].sum())
-        p_mom_count = int(p_df['MOM'].sum())
+        p_apps = p_stats['경기수']
+        p_starts = p_stats['선발']
+        p_subs = p_stats['교체']
+        stat_val_1 = p_stats['득점']
+        p_mom_count = p_stats['MOM']
         
         if is_goalkeeper:
-            stat_val_2 = int(p_df['실점'].sum())
+            stat_val_2 = p_stats['실점']
             val2_html = f"<span class='val-red'>{stat_val_2}</span><span class='metric-unit'></span>"
             stat2_label = "개인 득점 / 실점(GK)"
             val1_html = f"<span class='val-blue'>{stat_val_1}</span><span class='metric-unit'></span>"
         else:
-            stat_val_2 = int(p_df['도움'].sum())
+            stat_val_2 = p_stats['도움']
             val2_html = f"{stat_val_2}<span class='metric-unit'></span>"
             stat2_label = "개인 득점 / 도움"
             val1_html = f"<span class='val-blue'>{stat_val_1}</span><span class='metric-unit'></span>"
@@ -450,6 +719,11 @@ else:
         with pc4:
             render_metric("MOM 선정 횟수", f"{p_mom_count}<span class='metric-unit'>회</span>")
         
+        # 여러 명을 고른 경우: 합산 기록 대신 선수별로 나란히 비교
+        if len(selected_players) > 1 and st.toggle("선수별 비교", key='compare_mode'):
+            st.markdown("##### 선수 비교")
+            player_comparison_view(data, filters)
+
         st.divider()
         
         # -----------------------------------------------------------------
@@ -459,23 +733,8 @@ else:
             st.markdown("##### 연도별 기록 비교")
             
             # 연도별 집계: 경기수, 득점, 도움, 실점, 출전시간, MOM
-            yearly_stats = p_df.groupby('연도').agg({
-                '날짜': 'count', # 경기수
-                '출전시간': 'sum',
-                '득점': 'sum',
-                '도움': 'sum',
-                '실점': 'sum',
-                'MOM': 'sum'
-            }).rename(columns={'날짜': '경기수'})
-            
-            # 선발 횟수 별도 집계 (집계 함수에서 lambda 쓰기보다 안전하게)
-            start_counts = p_df[p_df['선발/교체'] == '선발'].groupby('연도').size()
-            yearly_stats['선발'] = start_counts
-            yearly_stats['선발'] = yearly_stats['선발'].fillna(0).astype(int)
-            yearly_stats['교체'] = yearly_stats['경기수'] - yearly_stats['선발']
-            
-            # 최신 연도가 위로 오게 정렬
-            yearly_stats = yearly_stats.sort_index(ascending=True)
+            with stage("연도별 집계"):
+                yearly_stats = query(engine.yearly_stats, data, filters)
 
             # 인덱스(연도)를 컬럼으로 꺼내고 문자열로 변환 (2,025 방지)
             yearly_display = yearly_stats.reset_index()
@@ -484,23 +743,56 @@ else:
             # 표시할 컬럼 순서
             show_cols = ['연도', '경기수', '출전시간', '득점', '도움', '실점', 'MOM']
             
-            st.dataframe(
-                yearly_display[show_cols], 
-                use_container_width=True, 
-                hide_index=True,
-                column_config={
-                    "연도": st.column_config.TextColumn("연도"),
-                    "경기수": st.column_config.NumberColumn("경기수", format="%d"),
-                    "출전시간": st.column_config.NumberColumn("출전시간", format="%d"),
-                    "득점": st.column_config.NumberColumn("득점", format="%d"),
-                    "도움": st.column_config.NumberColumn("도움", format="%d"),
-                    "실점": st.column_config.NumberColumn("실점", format="%d"),
-                    "MOM": st.column_config.NumberColumn("MOM", format="%d"),
-                }
-            )
+            with stage("연도별 표시"):
+                st.dataframe(
+                    yearly_display[show_cols], 
+                    use_container_width=True, 
+                    hide_index=True,
+                    column_config={
+                        "연도": st.column_config.TextColumn("연도"),
+                        "경기수": st.column_config.NumberColumn("경기수", format="%d"),
+                        "출전시간": st.column_config.NumberColumn("출전시간", format="%d"),
+                        "득점": st.column_config.NumberColumn("득점", format="%d"),
+                        "도움": st.column_config.NumberColumn("도움", format="%d"),
+                        "실점": st.column_config.NumberColumn("실점", format="%d"),
+                        "MOM": st.column_config.NumberColumn("MOM", format="%d"),
+                    }
+                )
+            export_buttons(yearly_stats, "yearly", "연도별 기록", show_cols[1:], index=True)
             st.divider()
         
+        # 경기 흐름: 누적 득점 / 득점당 출전시간 추이와 선수별 현재 흐름
+        with stage("경기 흐름"):
+            p_form = query(engine.player_form, data, filters)
+            p_streaks = query(engine.player_streaks, data, filters)
+        if not p_form.empty:
+            n = engine.FORM_WINDOW
+            st.markdown("##### 경기 흐름")
+            gc1, gc2 = st.columns(2)
+            with gc1:
+                st.caption("누적 득점")
+                st.line_chart(p_form.pivot_table(index='날짜', columns='선수명', values='누적득점', aggfunc='last', observed=True).ffill())
+            with gc2:
+                st.caption("득점당 출전시간 (분)")
+                st.line_chart(p_form.pivot_table(index='날짜', columns='선수명', values='득점당출전시간', aggfunc='last', observed=True).ffill())
+
+            with stage("경기 흐름 표시"):
+                st.dataframe(
+                    p_streaks.reset_index(),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "최근득점": st.column_config.NumberColumn(f"최근 {n}경기 득점", format="%d"),
+                        "연속득점": st.column_config.NumberColumn("연속 득점 (현재)", format="%d"),
+                        "최장연속득점": st.column_config.NumberColumn("연속 득점 (최장)", format="%d"),
+                        "득점당출전시간": st.column_config.NumberColumn("득점당 출전시간", format="%.1f"),
+                    }
+                )
+            st.divider()
+
         st.markdown("##### Match Log")
+        with stage("Match Log"):
+            p_df = query(engine.match_log, data, filters)
         if not p_df.empty:
             view_df = p_df.copy()
             view_df['MOM'] = view_df['MOM'].apply(lambda x: 'O' if x == 1 else '')
@@ -515,14 +807,43 @@ else:
             
             view_cols = [c for c in cols if c in view_df.columns]
             
-            # 날짜 기준 내림차순 정렬
-            view_df = view_df.sort_values(by='날짜', ascending=True)
-            
             # 출력 시 날짜 포맷 변환
             view_df['날짜'] = view_df['날짜'].dt.strftime('%Y-%m-%d')
             
-            st.dataframe(view_df[view_cols].fillna(""), use_container_width=True, hide_index=True)
+            with stage("Match Log 표시"):
+                st.dataframe(view_df[view_cols].fillna(""), use_container_width=True, hide_index=True)
+            export_buttons(p_df, "match_log", "Match Log", EXPORT_LOG_COLS)
         else:
             st.warning("선택된 조건의 기록이 없습니다.")
             
         st.markdown('</div>', unsafe_allow_html=True)
+
+# -----------------------------------------------------------------------------
+# 7. 진단 패널 (진단 모드에서만 표시)
+# -----------------------------------------------------------------------------
+if profiler is not None:
+    profiling.deactivate(profile_token)
+    profiler.finish()
+    history = profile_history()
+    history.append(profiler.to_dict())
+
+    with st.expander(f"진단: 이번 실행 {profiler.total_ms:.0f}ms", expanded=False):
+        st.markdown("##### 단계별 처리 시간 / 최대 메모리")
+        stage_table(profiler)
+
+        cache_stats = query_cache.stats()
+        st.caption("조회 캐시: " + " / ".join(f"{k} {v:,}" for k, v in cache_stats.items()))
+
+        st.markdown(f"##### 최근 {len(history)}회 실행")
+        history_rows = [
+            {'실행': i + 1, '범위': run['scope'], '전체(ms)': run['total_ms'], **{r['stage']: r['ms'] for r in run['stages']}}
+            for i, run in enumerate(history)
+        ]
+        st.dataframe(history_rows, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            "JSON 내보내기",
+            json.dumps(list(history), ensure_ascii=False, indent=2),
+            file_name="ssu_profile.json",
+            mime="application/json",
+        )
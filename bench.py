@@ -0,0 +1,164 @@
+"""재실행(rerun) 단계별 처리 시간 벤치마크
+
+gen_data.py로 배율별 가상 데이터를 만든 뒤, 화면 한 번 그릴 때 거치는 단계
+(CSV 파싱, 데이터 검증, 전처리, 사전 집계/색인, 득점 기록, 경기 흐름, 상대 전적, 스냅샷/번들, 연도별 파티션, 필터, 경기 목록, 조회 캐시, 팀 기록, 랭킹, 연도별 집계, 내보내기)를
+대표 필터 조합별로 측정합니다.
+
+    python bench.py                                  # 배율 1, 10, 100
+    python bench.py --scales 1 10 100 1000 --save bench_baseline.json
+    python bench.py --compare bench_baseline.json    # 저장한 결과 대비 회귀 표
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import stats_engine as engine
+from stats_engine import Filters
+import gen_data
+
+
+def measure(fn, setup=None, repeat=5):
+    """fn 실행 시간 중앙값 (ms), setup은 매번 새 입력을 만들 때 사용 (측정 제외)"""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def representative_filters(ds):
+    """실제 사용 패턴에 가까운 필터 조합 (최신 연도, 대회, 득점 상위 선수 등)"""
+    latest_year = max(ds.player_index['연도'])
+    top_tour = ds.player['대회명'].value_counts().index[0]
+    top_opp = ds.player['상대팀'].value_counts().index[0]
+    scorers = engine.player_career_table(ds)['선수명'].tolist()
+    return {
+        '전체': Filters(),
+        '최신 연도': Filters(years=(latest_year,)),
+        '연도+대회': Filters(years=(latest_year,), tournaments=(top_tour,)),
+        '선수 1명': Filters(players=tuple(scorers[:1])),
+        '선수 3명+상대팀': Filters(opponents=(top_opp,), players=tuple(scorers[:3])),
+        '선수 30명': Filters(players=tuple(scorers[:30])),
+    }
+
+
+def bench_scale(scale, data_dir, repeat):
+    """배율 하나에 대한 측정 결과 [(단계, 필터, ms)]"""
+    player_path, match_path = gen_data.write_dataset(os.path.join(data_dir, f"x{scale:g}"), scale)
+    with open(player_path, "r", encoding="utf-8") as f:
+        player_csv = f.read()
+    with open(match_path, "r", encoding="utf-8") as f:
+        match_csv = f.read()
+
+    def parse():
+        p_header, p_rows = engine.split_csv_rows(player_csv)
+        m_header, m_rows = engine.split_csv_rows(match_csv)
+        return engine.parse_rows(p_header, p_rows), engine.parse_rows(m_header, m_rows)
+
+    df_p, df_m = parse()
+    ds = engine.load_csv_text(player_csv, match_csv)
+    data_key = engine.csv_digest(player_csv, match_csv)
+    results = [
+        ('CSV 파싱', '-', measure(parse, repeat=repeat)),
+        ('형식 검사', '-', measure(lambda p, m: (engine.check_values(p, '선수기록'), engine.check_values(m, '경기기록')), lambda: (df_p, df_m), repeat)),
+        ('전처리', '-', measure(engine.preprocess_data, lambda: (df_p.copy(), df_m.copy()), repeat)),
+        ('기록 대조', '-', measure(engine.validate_dataset, lambda: (ds.player, ds.match), repeat)),
+        ('사전 집계', '-', measure(engine.build_rollup, lambda: (ds.player,), repeat)),
+        ('필터 색인', '-', measure(engine.build_filter_index, lambda: (ds.player,), repeat)),
+        ('득점 기록', '-', measure(engine.build_goal_events, lambda: (ds.match,), repeat)),
+        ('경기 흐름', '-', measure(engine.build_player_timeline, lambda: (ds.player,), repeat)),
+        ('상대 전적', '-', measure(engine.build_opponent_tables, lambda: (ds.player, ds.match, ds.rollup), repeat)),
+    ]
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        engine.save_snapshot(snapshot_dir, data_key, ds)
+        results.append(('스냅샷 로드', '-', measure(engine.load_snapshot, lambda: (snapshot_dir, data_key), repeat)))
+        bundle_path = os.path.join(snapshot_dir, "bundle.npz")
+        engine.save_bundle(bundle_path, data_key, ds)
+        results.append(('번들 로드', '-', measure(engine.load_bundle, lambda: (bundle_path, data_key), repeat)))
+
+        # 스냅샷/번들에서 읽은 뒤 선수 기록이 처음 필요할 때 읽는 연도별 파티션 (최신 연도만 / 전체 연도)
+        latest = (max(ds.player_index['연도']),)
+        for name, load, path in (('스냅샷', engine.load_snapshot, snapshot_dir), ('번들', engine.load_bundle, bundle_path)):
+            results.append((f'{name} 파티션', '최신 연도', measure(
+                engine.season_rows, lambda: (load(path, data_key), latest), repeat)))
+            results.append((f'{name} 파티션', '전체', measure(
+                engine.season_rows, lambda: (load(path, data_key),), repeat)))
+
+    top_opp = ds.opponent_table['경기수'].idxmax()
+    results.append(('상대 전적 조회', '-', measure(engine.opponent_profile, lambda: (ds, top_opp), repeat)))
+
+    cache = engine.QueryCache()
+    for name, f in representative_filters(ds).items():
+        results.append(('필터 적용', name, measure(engine.filter_players, lambda: (ds, f), repeat)))
+        results.append(('경기 목록', name, measure(engine.match_list, lambda: (ds, f), repeat)))
+        # 같은 필터를 다시 고른 경우 (첫 호출에서 채운 캐시 결과 재사용)
+        results.append(('경기 목록 (캐시)', name, measure(cache.get, lambda: (data_key, engine.match_list, ds, f), repeat)))
+        if f.players:
+            results.append(('선수 기록', name, measure(engine.player_summary, lambda: (ds, f), repeat)))
+            results.append(('연도별 집계', name, measure(engine.yearly_stats, lambda: (ds, f), repeat)))
+            results.append(('Match Log', name, measure(engine.match_log, lambda: (ds, f), repeat)))
+            log = engine.match_log(ds, f)
+            for fmt in ('CSV', 'Parquet'):
+                results.append((f'{fmt} 내보내기', name, measure(
+                    engine.export_table, lambda: (log, fmt, io.BytesIO()), repeat)))
+            results.append(('득점 기록 조회', name, measure(engine.goal_events, lambda: (ds, f), repeat)))
+            results.append(('선수 흐름', name, measure(engine.player_form, lambda: (ds, f), repeat)))
+            results.append(('선수 비교', name, measure(engine.player_comparison, lambda: (ds, f), repeat)))
+            results.append(('연도별 비교', name, measure(engine.player_yearly_split, lambda: (ds, f), repeat)))
+        else:
+            results.append(('팀 기록', name, measure(engine.team_summary, lambda: (ds, f), repeat)))
+            results.append(('랭킹', name, measure(engine.ranking, lambda: (ds, f), repeat)))
+            results.append(('팀 흐름', name, measure(engine.team_form, lambda: (ds, f), repeat)))
+    return len(ds.player), len(ds.match), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSU DATA CENTER 단계별 처리 시간 벤치마크")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100], help="현재 데이터 대비 배율 목록")
+    parser.add_argument("--repeat", type=int, default=5, help="단계별 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--data-dir", default="bench_data", help="가상 데이터 저장 폴더")
+    parser.add_argument("--save", help="측정 결과를 JSON으로 저장")
+    parser.add_argument("--compare", help="이전에 저장한 JSON과 비교")
+    parser.add_argument("--threshold", type=float, default=1.25, help="이 배수 이상 느려지면 회귀로 표시")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {(r['scale'], r['stage'], r['filter']): r['ms'] for r in json.load(f)}
+
+    records, regressions = [], 0
+    print(f"{'배율':>6}  {'단계':<10} {'필터':<14} {'ms':>10} {'이전 ms':>10} {'비율':>7}")
+    for scale in args.scales:
+        n_players, n_matches, results = bench_scale(scale, args.data_dir, args.repeat)
+        print(f"# x{scale:g}: 선수 기록 {n_players:,}행 / 경기 {n_matches:,}건")
+        for stage, filter_name, ms in results:
+            records.append({'scale': scale, 'stage': stage, 'filter': filter_name, 'ms': round(ms, 3)})
+            prev = baseline.get((scale, stage, filter_name))
+            if prev:
+                ratio = ms / prev if prev else float('inf')
+                flag = " ▲" if ratio >= args.threshold else ""
+                regressions += bool(flag)
+                prev_text, ratio_text = f"{prev:10.2f}", f"{ratio:6.2f}x{flag}"
+            else:
+                prev_text, ratio_text = f"{'-':>10}", f"{'-':>7}"
+            print(f"{scale:>6g}  {stage:<10} {filter_name:<14} {ms:10.2f} {prev_text} {ratio_text}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    if regressions:
+        print(f"회귀 {regressions}건 (기준 {args.threshold}x)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
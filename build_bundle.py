@@ -0,0 +1,34 @@
+"""브라우저(stlite)용 정적 번들 생성
+
+index.html로 접속하면 방문자 브라우저(Pyodide)에서 CSV 파싱/전처리/집계를 전부 다시 하므로
+휴대폰에서는 첫 화면까지 오래 걸립니다. CSV를 고친 뒤 이 스크립트로 번들을 다시 만들어 같이 올리면,
+app.py는 브라우저에서 번들을 바로 읽고 CSV 내용이 번들과 다를 때만 다시 계산합니다.
+
+    python build_bundle.py                        # bundle.npz 생성
+    python build_bundle.py --player p.csv --match m.csv --out bundle.npz
+"""
+import os
+import time
+import argparse
+
+import stats_engine as engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSU DATA CENTER 브라우저용 정적 번들 생성")
+    parser.add_argument("--player", default="player_records.csv", help="선수기록 CSV 경로")
+    parser.add_argument("--match", default="match_records.csv", help="경기기록 CSV 경로")
+    parser.add_argument("--out", default="bundle.npz", help="번들 파일 경로")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data_key, ds = engine.load_csv_files(args.player, args.match)
+    engine.save_bundle(args.out, data_key, ds)
+    finished = time.perf_counter()
+
+    print(f"선수 기록 {len(ds.player):,}행 / 경기 {len(ds.match):,}건")
+    print(f"{args.out} ({os.path.getsize(args.out) / 1024:.1f}KB) 생성 완료, {finished - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""시즌/선수별 기록 리포트 일괄 생성 (Streamlit 없이 실행)
+
+    python build_reports.py                       # reports/ 아래에 생성
+    python build_reports.py --out season_end_2025 --player p.csv --match m.csv
+
+생성 파일
+    seasons.csv            연도별 팀 성적
+    player_career.csv      선수별 통산 기록
+    player_yearly.csv      선수 x 연도별 기록
+    goal_mismatches.csv    득점자/도움자와 선수기록 득점/도움이 다른 경기
+    validation.csv         입력 데이터 검증 결과 (형식 오류, 경기기록과 맞지 않는 기록)
+    seasons/<연도>.csv     해당 연도 선수 랭킹
+    players/<선수명>.csv   선수별 Match Log
+"""
+import os
+import time
+import argparse
+
+import stats_engine as engine
+
+# 엑셀에서 바로 열어도 한글이 깨지지 않도록 BOM 포함
+OUTPUT_ENCODING = "utf-8-sig"
+
+MATCH_LOG_COLS = ['날짜', '대회명', '라운드', '상대팀', '선발/교체', '출전시간', '득점', '도움', '실점', 'MOM', '경고', '비고']
+
+
+def safe_filename(name):
+    """파일 이름에 쓸 수 없는 문자 치환"""
+    return "".join("_" if c in '\\/:*?"<>|' else c for c in str(name)).strip() or "_"
+
+
+def write_csv(df, path, index=False):
+    df.to_csv(path, index=index, encoding=OUTPUT_ENCODING)
+
+
+def build_reports(ds, out_dir):
+    """Dataset 하나로 모든 시즌/선수 리포트 생성, 생성한 파일 수 반환"""
+    os.makedirs(os.path.join(out_dir, "seasons"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "players"), exist_ok=True)
+
+    write_csv(engine.season_table(ds), os.path.join(out_dir, "seasons.csv"), index=True)
+    write_csv(engine.player_career_table(ds), os.path.join(out_dir, "player_career.csv"))
+    yearly = engine.player_yearly_table(ds)
+    write_csv(yearly, os.path.join(out_dir, "player_yearly.csv"))
+    mismatches = ds.goal_mismatches.assign(날짜=ds.goal_mismatches['날짜'].dt.strftime('%Y-%m-%d'))
+    write_csv(mismatches, os.path.join(out_dir, "goal_mismatches.csv"))
+    write_csv(ds.validation.drop(columns='row_hash'), os.path.join(out_dir, "validation.csv"))
+    n_files = 5
+
+    # 시즌별 랭킹: 선수 x 연도 집계를 한 번 정렬한 뒤 연도별로 나눠서 저장
+    season_rank = yearly.sort_values(['연도', '득점', '경기수', '출전시간'], ascending=[True, False, False, False])
+    for year, rows in season_rank.groupby('연도', observed=True, sort=False):
+        write_csv(rows.drop(columns='연도'), os.path.join(out_dir, "seasons", f"{year}.csv"))
+        n_files += 1
+
+    # 선수별 Match Log: 전체 출전 기록을 한 번 정렬한 뒤 선수별로 나눠서 저장
+    cols = [c for c in MATCH_LOG_COLS if c in ds.player.columns]
+    logs = ds.player.sort_values(['선수명', '날짜'], kind='stable')
+    for player, rows in logs.groupby('선수명', observed=True, sort=False):
+        log = rows[cols].copy()
+        log['날짜'] = log['날짜'].dt.strftime('%Y-%m-%d')
+        write_csv(log, os.path.join(out_dir, "players", f"{safe_filename(player)}.csv"))
+        n_files += 1
+    return n_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSU DATA CENTER 시즌/선수 리포트 일괄 생성")
+    parser.add_argument("--player", default="player_records.csv", help="선수기록 CSV 경로")
+    parser.add_argument("--match", default="match_records.csv", help="경기기록 CSV 경로")
+    parser.add_argument("--out", default="reports", help="리포트 저장 폴더")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    _, ds = engine.load_csv_files(args.player, args.match)
+    loaded = time.perf_counter()
+    n_files = build_reports(ds, args.out)
+    finished = time.perf_counter()
+
+    print(f"선수 기록 {len(ds.player):,}행 / 경기 {len(ds.match):,}건")
+    if len(ds.goal_mismatches):
+        print(f"득점/도움 기록 불일치 {len(ds.goal_mismatches):,}건 -> {args.out}/goal_mismatches.csv")
+    if len(ds.validation):
+        print(f"입력 데이터 검증 {len(ds.validation):,}건 -> {args.out}/validation.csv")
+    print(f"로드 {loaded - started:.2f}s, 리포트 {finished - loaded:.2f}s -> {args.out}/ ({n_files}개 파일)")
+
+
+if __name__ == "__main__":
+    main()
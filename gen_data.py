@@ -0,0 +1,181 @@
+"""벤치마크용 가상 기록 생성기
+
+실제 player_records.csv / match_records.csv와 같은 컬럼, 같은 표기법
+("2:2(5PSO4)" 스코어, "김경민(2), 최규현" 득점자 목록, 빈 칸이 많은 숫자 컬럼)으로
+원하는 배율만큼 큰 데이터를 만듭니다. scale=1이면 현재 데이터와 비슷한 규모
+(4시즌, 약 120경기, 약 1,300 출전 기록)입니다.
+
+    python gen_data.py --scale 100 --out bench_data/x100
+"""
+import os
+import csv
+import argparse
+
+import numpy as np
+
+MATCH_COLUMNS = ['연도', '대회명', '라운드', '날짜', '상대팀', '스코어', '득점자', '도움자', 'MOM', '매치데이', '비고']
+PLAYER_COLUMNS = ['연도', '대회명', '라운드', '날짜', '상대팀', '선수명', '선발/교체', '출전시간', '득점', '도움', '실점', 'MOM', '경고', '비고']
+
+# 대회명, 시즌당 경기 수, 토너먼트 여부
+TOURNAMENTS = [
+    ('U리그', 16, False),
+    ('춘계대회', 4, True),
+    ('추계대회', 5, True),
+    ('저학년대회', 5, True),
+    ('왕중왕전', 2, True),
+]
+KNOCKOUT_ROUNDS = ['조별리그', '조별리그', '32강', '16강', '8강', '준결승', '결승']
+MATCHES_PER_SEASON = sum(n for _, n, _ in TOURNAMENTS)
+
+SURNAMES = list("김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허유남심노하곽성차주우구민진나지엄채원천방공현함변염여추도소석선설마길연위표명기반왕금옥육인맹제모탁국어은편용예봉경사부가복태목형피두감음빈동온호범좌")
+GIVEN = list("민서준도현우지훈건재영승희성태동규하윤석호진수경찬상혁유찬기주환용원철")
+UNIVERSITIES = list("경일대 대신대 칼빈대 동의대 고려대 성균관대 홍익대 수원대 동국대 중앙대 용인대 연세대 상지대 김해대 아주대 "
+                    "동원대 신성대 전주대 인천대 선문대 호원대 울산대 김천대 광운대 제주국제대 대구대 단국대 한양대 세경대 "
+                    "조선대 위덕대 군장대 건국대 한남대 인제대 배재대 명지대 동명대 초당대 제주한라대 동아대 송호대 영남대 "
+                    "연성대 광주대 호남대 청운대".split())
+
+SQUAD_SIZE = 30       # 시즌별 선수단 규모
+SQUAD_TURNOVER = 8    # 매 시즌 새로 들어오는 선수 수
+MAX_SEASONS = 40      # 한 팀의 최대 시즌 수, 넘으면 다른 팀(대회명에 "n팀" 표기)으로 나눔
+
+
+def make_names(rng, n):
+    """겹치지 않는 한글 이름 n개"""
+    names, seen = [], set()
+    while len(names) < n:
+        name = rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN)
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def scorer_text(names, counts):
+    """득점자 표기 ("김경민(2), 최규현"), 없으면 "-" """
+    parts = [f"{n}({c})" if c > 1 else n for n, c in zip(names, counts) if c > 0]
+    return ", ".join(parts) if parts else "-"
+
+
+def season_schedule():
+    """(대회명, 라운드, 토너먼트 여부) 목록, 대회 순서대로"""
+    schedule = []
+    for name, n_matches, knockout in TOURNAMENTS:
+        for i in range(n_matches):
+            if knockout:
+                rnd = KNOCKOUT_ROUNDS[min(i, len(KNOCKOUT_ROUNDS) - 1)]
+            else:
+                rnd = f"{i + 1}라운드"
+            schedule.append((name, rnd, knockout and rnd != '조별리그'))
+    return schedule
+
+
+def generate(scale=1.0, seed=0, start_year=2022):
+    """(match_rows, player_rows) 생성, 각 행은 컬럼 순서대로 나열한 리스트"""
+    rng = np.random.default_rng(seed)
+    n_matches = max(1, int(round(121 * scale)))
+    n_seasons = int(np.ceil(n_matches / MATCHES_PER_SEASON))
+    n_squads = int(np.ceil(n_seasons / MAX_SEASONS))
+    seasons_per_squad = int(np.ceil(n_seasons / n_squads))
+    squad_pool_size = SQUAD_SIZE + SQUAD_TURNOVER * seasons_per_squad
+    # 선수 이름이 부족하지 않도록 전체 시즌에 필요한 만큼 미리 생성
+    pool = make_names(rng, squad_pool_size * n_squads)
+
+    match_rows, player_rows = [], []
+    for squad_no in range(n_squads):
+        squad_pool = pool[squad_no * squad_pool_size:(squad_no + 1) * squad_pool_size]
+        for s in range(seasons_per_squad):
+            generate_season(
+                rng, start_year + s, squad_no, squad_pool[s * SQUAD_TURNOVER: s * SQUAD_TURNOVER + SQUAD_SIZE],
+                n_matches - len(match_rows), match_rows, player_rows,
+            )
+            if len(match_rows) >= n_matches:
+                return match_rows, player_rows
+    return match_rows, player_rows
+
+
+def generate_season(rng, year, squad_no, squad, limit, match_rows, player_rows):
+    """한 시즌 일정만큼 (최대 limit경기) match_rows / player_rows에 추가"""
+    keepers, outfield = squad[:3], squad[3:]
+    day = np.datetime64(f"{year}-02-10")
+    for n, (tour, rnd, knockout) in enumerate(season_schedule()):
+        if n >= limit:
+            break
+        if squad_no:
+            tour = f"{tour} {squad_no + 1}팀"
+        day = day + int(rng.integers(2, 8))
+        date = str(day)
+        opp = rng.choice(UNIVERSITIES)
+        gf, ga = int(rng.poisson(1.7)), int(rng.poisson(1.1))
+        score = f"{gf}:{ga}"
+        if knockout and gf == ga:
+            pso = rng.integers(2, 6, size=2)
+            if pso[0] == pso[1]:
+                pso[int(rng.integers(0, 2))] += 1
+            score += f"({pso[0]}PSO{pso[1]})"
+
+        # 선발 11명 (GK 1) + 교체 0~6명
+        gk = rng.choice(keepers)
+        starters = [gk] + list(rng.choice(outfield, size=10, replace=False))
+        bench = [p for p in outfield if p not in starters]
+        subs = list(rng.choice(bench, size=int(rng.integers(0, 7)), replace=False))
+        lineup = starters + subs
+        minutes = [int(rng.choice([90, 95, 96])) for _ in starters] + [int(rng.integers(1, 46)) for _ in subs]
+
+        goals = np.zeros(len(lineup), dtype=int)
+        if gf:
+            np.add.at(goals, rng.integers(1, len(lineup), size=gf), 1)
+        assists = np.zeros(len(lineup), dtype=int)
+        if gf:
+            n_assists = int(rng.binomial(gf, 0.4))
+            np.add.at(assists, rng.integers(1, len(lineup), size=n_assists), 1)
+        mom_idx = int(rng.integers(0, len(lineup))) if rng.random() < 0.6 else -1
+
+        match_rows.append([
+            year, tour, rnd, date, opp, score,
+            scorer_text(lineup, goals), "", lineup[mom_idx] if mom_idx >= 0 else "-", "", "",
+        ])
+        for i, player in enumerate(lineup):
+            player_rows.append([
+                year, tour, rnd, date, opp, player,
+                '선발' if i < len(starters) else '교체',
+                minutes[i],
+                goals[i] or "",
+                assists[i] or "",
+                ga if i == 0 and ga else "",
+                1 if i == mom_idx else "",
+                1 if rng.random() < 0.05 else "",
+                "",
+            ])
+
+
+def write_csv(path, columns, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def write_dataset(out_dir, scale=1.0, seed=0):
+    """out_dir에 player_records.csv / match_records.csv 생성, 두 파일 경로 반환"""
+    os.makedirs(out_dir, exist_ok=True)
+    match_rows, player_rows = generate(scale, seed)
+    player_path = os.path.join(out_dir, "player_records.csv")
+    match_path = os.path.join(out_dir, "match_records.csv")
+    write_csv(match_path, MATCH_COLUMNS, match_rows)
+    write_csv(player_path, PLAYER_COLUMNS, player_rows)
+    return player_path, match_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가상 경기/선수 기록 생성")
+    parser.add_argument("--scale", type=float, default=10, help="현재 데이터 대비 배율 (1 = 약 120경기)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_data", help="CSV 저장 폴더")
+    args = parser.parse_args()
+
+    player_path, match_path = write_dataset(args.out, args.scale, args.seed)
+    print(f"{match_path}, {player_path} 생성 완료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""단계별 처리 시간 / 메모리 측정 (진단 모드에서만 동작)
+
+    profiler = Profiler()
+    token = activate(profiler)
+    with stage("CSV 파싱"):
+        ...
+    deactivate(token)
+    profiler.records  # [{'stage', 'depth', 'ms', 'peak_kb'}, ...]
+
+활성화된 Profiler가 없으면 stage()는 아무 것도 하지 않으므로,
+stats_engine 같은 공용 코드에 넣어둬도 평소에는 비용이 거의 없습니다.
+메모리는 Profiler(trace_memory=True)일 때만 tracemalloc으로 측정합니다. tracemalloc은 프로세스 전체에
+적용되므로 한 번에 한 실행만 측정하고(나머지는 시간만), 그 실행이 끝나면 추적을 멈춥니다.
+측정 중에는 다른 세션이 할당한 메모리도 같이 잡힐 수 있습니다.
+"""
+import time
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+# Streamlit은 세션마다 다른 스레드에서 스크립트를 실행하므로 ContextVar로 구분
+_active = contextvars.ContextVar("ssu_profiler", default=None)
+
+# 메모리를 측정 중인 Profiler (reset_peak()이 프로세스 전체에 적용되므로 동시에 하나만)
+_memory_lock = threading.Lock()
+_memory_owner = None
+_memory_started = False  # 여기서 tracemalloc을 켰는지 (원래 켜져 있었으면 끄지 않음)
+
+
+class Profiler:
+    """한 번의 실행(rerun) 동안 단계별 기록을 모음"""
+
+    def __init__(self, trace_memory=False, scope="전체"):
+        self.trace_memory = trace_memory  # 다른 실행이 이미 측정 중이면 activate()에서 False로 바뀜
+        self.scope = scope  # 측정 범위 (전체 실행 또는 부분 재실행한 영역 이름)
+        self.started_at = time.time()
+        self.records = []
+        self._stack = []
+        self._seq = 0
+        self._t0 = time.perf_counter()
+        self.total_ms = None
+
+    def memory(self):
+        """(현재, 최대) 할당량, 메모리를 측정하지 않으면 (0, 0)"""
+        return tracemalloc.get_traced_memory() if self.trace_memory else (0, 0)
+
+    def enter(self, name):
+        current, peak = self.memory()
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._stack.append({
+            'name': name, 'seq': self._seq,
+            'start': time.perf_counter(), 'mem': current, 'peak': current,
+        })
+        self._seq += 1
+
+    def exit(self):
+        elapsed = time.perf_counter()
+        _, peak = self.memory()
+        frame = self._stack.pop()
+        frame['peak'] = max(frame['peak'], peak)
+        self.records.append({
+            'seq': frame['seq'],
+            'stage': frame['name'],
+            'depth': len(self._stack),
+            'ms': round((elapsed - frame['start']) * 1000, 3),
+            'peak_kb': round((frame['peak'] - frame['mem']) / 1024, 1) if self.trace_memory else None,
+        })
+        # 바깥 단계의 최대 메모리에 안쪽 단계의 최대치도 반영
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        # 안쪽 단계가 먼저 끝나므로 시작 순서대로 다시 정렬
+        self.records.sort(key=lambda r: r['seq'])
+        return self
+
+    def to_dict(self):
+        return {'started_at': self.started_at, 'scope': self.scope, 'total_ms': self.total_ms, 'stages': self.records}
+
+
+def _claim_memory(profiler):
+    """profiler가 메모리를 측정할 수 있으면 tracemalloc을 켬 (다른 실행이 측정 중이면 시간만 측정)"""
+    global _memory_owner, _memory_started
+    with _memory_lock:
+        if _memory_owner is not None:
+            profiler.trace_memory = False
+            return
+        _memory_owner = profiler
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory_started = True
+
+
+def _release_memory(profiler):
+    """profiler가 측정 중이었으면 tracemalloc 정리 (직접 켠 경우에만 끔)"""
+    global _memory_owner, _memory_started
+    with _memory_lock:
+        if profiler is None or _memory_owner is not profiler:
+            return
+        _memory_owner = None
+        if _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+def activate(profiler):
+    """현재 실행에 profiler 연결 (None이면 측정하지 않음), deactivate()에 넘길 토큰 반환
+
+    이전 실행이 중간에 끝나서(st.stop 등) 정리하지 못한 profiler가 남아 있으면 먼저 정리합니다.
+    """
+    _release_memory(_active.get())
+    if profiler is not None and profiler.trace_memory:
+        _claim_memory(profiler)
+    return _active.set(profiler)
+
+
+def current():
+    """현재 실행에 연결된 Profiler (없으면 None)"""
+    return _active.get()
+
+
+def deactivate(token):
+    _release_memory(_active.get())
+    _active.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """이름 붙인 단계의 처리 시간과 최대 메모리 기록"""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        profiler.exit()
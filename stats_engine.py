@@ -0,0 +1,1696 @@
+"""SSU DATA CENTER 기록 집계 엔진
+
+Streamlit 없이 pandas만으로 동작하는 데이터 처리/집계 모듈입니다.
+app.py(화면)와 build_reports.py(일괄 리포트)가 같은 함수를 사용합니다.
+
+    ds = load_csv_text(player_csv, match_csv)
+    f = Filters(years=(2025,), players=('현대호',))
+    player_summary(ds, f), yearly_stats(ds, f), match_log(ds, f)
+"""
+import io
+import os
+import sys
+import json
+import importlib.util
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from profiling import stage
+
+# -----------------------------------------------------------------------------
+# 상수
+# -----------------------------------------------------------------------------
+
+# 필터바에서 사용하는 차원 (category 타입으로 저장하고 값별 행 위치를 미리 색인)
+FILTER_DIMS = ['연도', '대회명', '상대팀', '선수명']
+
+# 경기를 식별하는 컬럼 조합 (같은 날 같은 상대와 두 번 붙어도 대회/라운드로 구분)
+MATCH_KEY = ['날짜', '대회명', '라운드', '상대팀']
+
+# 필터 차원 (연도, 대회명, 상대팀, 선수명) 단위 사전 집계 테이블
+ROLLUP_KEYS = ['연도', '대회명', '상대팀', '선수명']
+ROLLUP_SUM_COLS = ['득점', '도움', '실점', 'MOM', '출전시간']
+
+NUMERIC_COLS = ['득점', '도움', '실점', '경고', 'MOM', '출전시간']
+# CSV를 읽을 때 타입을 추론하는 컬럼 (나머지는 모두 문자열로 읽어서 일부 행만 읽어도 타입이 같도록)
+PARSED_NUMERIC_COLS = ['연도'] + NUMERIC_COLS
+
+# 입력 검증: 표별 필수 컬럼 (없으면 불러오지 않음)과 검증 보고서 컬럼 타입
+REQUIRED_COLS = {
+    '선수기록': ['연도'] + MATCH_KEY + ['선수명', '선발/교체'] + ROLLUP_SUM_COLS,
+    '경기기록': ['연도'] + MATCH_KEY + ['스코어'],
+}
+ISSUE_DTYPES = {'표': str, '행': 'int64', '컬럼': str, '값': str, '문제': str, '구분': str, 'row_hash': 'uint64'}
+
+# "2:2(5PSO4)" -> 팀 득점, 상대 득점, 승부차기 팀, 승부차기 상대
+SCORE_PATTERN = r'^\s*(\d+)\s*:\s*(\d+)\s*(?:\(\s*(\d+)\s*PSO\s*(\d+)\s*\))?'
+# 아직 치르지 않았거나 취소된 경기의 스코어 표기 (결과 없음, 형식 오류 아님)
+SCORE_EMPTY = {'', '-'}
+
+# 경기기록의 득점자/도움자 텍스트 컬럼 -> 선수기록에서 대조할 컬럼
+EVENT_COLS = {'득점자': '득점', '도움자': '도움'}
+# "김경민(2)" -> 선수명, 횟수 (괄호가 없으면 1회)
+EVENT_PATTERN = r'^(?P<선수명>.+?)\s*(?:\(\s*(?P<횟수>\d+)\s*\))?$'
+# 득점 기록이 없는 경기 표기
+EVENT_EMPTY = {'', '-'}
+
+# 경기 흐름: 최근 폼 기본 경기 수, 결과별 승점, 누적/최근 합계와 연속 기록 컬럼
+FORM_WINDOW = 5
+POINTS = {'승': 3, '무': 1, '패': 0}
+TEAM_FORM_SUMS = ['승점', '득점', '실점']
+TEAM_FORM_STREAKS = {'무패연속': '무패경기', '득점연속': '득점경기'}  # 결과 컬럼: 조건 컬럼(bool)
+PLAYER_FORM_SUMS = ['경기', '득점', '도움', '출전시간']
+PLAYER_FORM_STREAKS = {'득점연속': '득점경기'}
+
+# 선수 비교 지표 (경기당이 아닌 90분당 환산 지표 포함)
+COMPARE_SUMS = ['경기수', '선발', '출전시간', '득점', '도움', '실점', 'MOM']
+PER90_COLS = ['득점', '도움', '실점']
+
+# 랭킹 정렬 기준별 표시 컬럼 순서 (앞의 3개가 정렬 우선순위)
+RANK_ORDERS = {
+    '득점': ['득점', '경기수', '출전시간', '도움', 'MOM'],
+    'MOM': ['MOM', '득점', '경기수', '출전시간', '도움'],
+    '경기수': ['경기수', '출전시간', '득점', '도움', 'MOM'],
+    '출전시간': ['출전시간', '경기수', '득점', '도움', 'MOM'],
+}
+
+# 전처리가 끝난 프레임을 Parquet으로 저장해두는 스냅샷 (CSV는 입력/내보내기 용도로만 사용)
+SNAPSHOT_KEEP = 4  # 최근에 저장된 버전만 유지
+CURRENT_FILE = "CURRENT.json"  # 마지막으로 공개한 버전의 data_key와 CSV 파일 이름 (재시작하면 저장소 CSV 대신 이 버전으로 시작)
+SNAPSHOT_VERSION = 7  # 저장 형식이나 컬럼 타입이 바뀌면 올려서 예전 스냅샷은 무시
+# 통째로 저장하는 프레임 (선수 기록은 연도별 파티션으로 따로 저장하고 필요한 연도만 읽음)
+# 출전 기록마다 한 행인 선수별 경기 흐름은 저장하지 않고 player_form()에서 고른 선수만 계산
+SNAPSHOT_FRAMES = [
+    'match', 'rollup', 'validation', 'goal_events', 'goal_mismatches', 'team_timeline',
+    'opponent_table', 'opponent_yearly', 'opponent_scorers',
+]
+PARTITION_WORKERS = 4  # 파티션을 동시에 읽는 스레드 수
+SEASON_VIEWS = 4  # 연도 조합별로 합쳐둔 선수 기록 보관 개수
+EMPTY_PARTITION = 'empty'  # 컬럼 구성만 있는 빈 파티션 (고른 연도가 없거나 선수 기록이 하나도 없을 때)
+
+# 브라우저(stlite)용 정적 번들 형식 버전 (인코딩이 바뀌면 올려서 예전 번들은 무시)
+BUNDLE_VERSION = 8
+BUNDLE_FRAMES = SNAPSHOT_FRAMES
+# 이 pandas에서 글자 컬럼을 읽었을 때의 타입 (pandas 3: str, pandas 2: object)
+TEXT_DTYPE = pd.Series(['']).dtype
+
+# 조회 결과 캐시 최대 크기 (결과 프레임 메모리 합계 기준)
+QUERY_CACHE_BYTES = 32 * 1024 * 1024
+
+# 표 내보내기: 형식 -> (확장자, MIME, 필요한 패키지), 한 번에 변환하는 행 수
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', None),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', 'pyarrow'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'openpyxl'),
+}
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_ENCODING = "utf-8-sig"  # 엑셀에서 CSV를 열어도 한글이 깨지지 않도록 BOM 포함
+
+
+@dataclass
+class Dataset:
+    """전처리된 프레임 + 사전 집계 + 필터 색인 묶음 (캐시/스냅샷 단위)
+
+    스냅샷/번들에서 읽은 경우 선수 기록(player, player_index)과 선수별 경기 흐름(player_timeline)은 None이고
+    seasons에서 필요한 연도만 읽습니다 (season_rows(), player_form() 참고).
+    """
+    player: pd.DataFrame | None
+    match: pd.DataFrame
+    rollup: pd.DataFrame
+    player_index: dict | None
+    rollup_index: dict
+    validation: pd.DataFrame
+    goal_events: pd.DataFrame
+    goal_index: dict
+    goal_mismatches: pd.DataFrame
+    team_timeline: pd.DataFrame
+    player_timeline: pd.DataFrame | None
+    opponent_table: pd.DataFrame
+    opponent_yearly: pd.DataFrame
+    opponent_scorers: pd.DataFrame
+    player_header: str | None = None
+    match_header: str | None = None
+    changes: dict | None = None
+    aggregates: dict | None = None  # 정적 번들에서 읽은 미리 계산된 집계 (AGGREGATES 참고)
+    seasons: 'SeasonPartitions | None' = None
+
+
+@dataclass(frozen=True)
+class Filters:
+    """필터바 선택값 (비어 있으면 해당 조건은 적용하지 않음)"""
+    years: tuple = ()
+    tournaments: tuple = ()
+    opponents: tuple = ()
+    players: tuple = ()
+
+    def selections(self, with_players=True):
+        """index_mask()에 넘길 {차원: 선택값} 형태"""
+        selections = {
+            '연도': self.years,
+            '대회명': self.tournaments,
+            '상대팀': self.opponents,
+        }
+        if with_players:
+            selections['선수명'] = self.players
+        return selections
+
+    def normalized(self):
+        """선택 순서/중복과 관계없이 같은 조건이면 같은 값 (조회 결과 캐시 키)"""
+        return Filters(*(tuple(sorted(set(values))) for values in (
+            self.years, self.tournaments, self.opponents, self.players,
+        )))
+
+# -----------------------------------------------------------------------------
+# 전처리
+# -----------------------------------------------------------------------------
+
+def downcast_ints(df, cols):
+    """소수점이 없는 숫자 컬럼은 가장 작은 정수 타입으로 변환"""
+    for col in cols:
+        if col in df.columns and (df[col] % 1 == 0).all():
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def preprocess_player(df_p):
+    """선수기록 전처리"""
+    # 날짜를 실제 날짜 형식(datetime)으로 변환
+    df_p['날짜'] = pd.to_datetime(df_p['날짜'], errors='coerce')
+    df_p['연도'] = df_p['연도'].astype(int)
+
+    for col in NUMERIC_COLS:
+        if col in df_p.columns:
+            df_p[col] = pd.to_numeric(df_p[col], errors='coerce').fillna(0)
+    df_p = downcast_ints(df_p, NUMERIC_COLS)
+
+    for col in FILTER_DIMS:
+        df_p[col] = df_p[col].astype('category')
+    return df_p
+
+def preprocess_match(df_m):
+    """경기기록 전처리"""
+    df_m['날짜'] = pd.to_datetime(df_m['날짜'], errors='coerce')
+    df_m['연도'] = df_m['연도'].astype(int)
+    return parse_scores(df_m)
+
+def preprocess_data(df_p, df_m):
+    """데이터 전처리 공통 함수"""
+    df_p = preprocess_player(df_p)
+    df_m = preprocess_match(df_m)
+    df_p, df_m = assign_match_ids(df_p, df_m)
+    return df_p, df_m
+
+def parse_scores(df_m):
+    """스코어 문자열을 한 번에 파싱해서 경기 결과 컬럼 추가"""
+    parts = df_m['스코어'].astype('string').str.extract(SCORE_PATTERN)
+    parts = parts.apply(pd.to_numeric).astype('Int64')
+
+    df_m['팀득점'] = parts[0]
+    df_m['상대득점'] = parts[1]
+    df_m['PSO팀'] = parts[2]
+    df_m['PSO상대'] = parts[3]
+    df_m['승부차기'] = parts[2].notna()
+
+    # 승부차기는 기록상 무승부로 처리
+    df_m['결과'] = pd.Series(pd.NA, index=df_m.index, dtype='string')
+    df_m.loc[df_m['팀득점'] > df_m['상대득점'], '결과'] = '승'
+    df_m.loc[df_m['팀득점'] == df_m['상대득점'], '결과'] = '무'
+    df_m.loc[df_m['팀득점'] < df_m['상대득점'], '결과'] = '패'
+    return df_m
+
+def assign_match_ids(df_p, df_m):
+    """경기마다 정수 match_id를 부여하고 선수 기록에 연결
+
+    df_m은 날짜순으로 정렬되어 match_id == 행 위치가 되므로,
+    match_id 배열만으로 경기 행을 바로 꺼낼 수 있습니다.
+    """
+    # 경기 키가 중복되면 선수 기록이 어느 경기인지 알 수 없으므로 바로 오류 처리
+    duplicated = df_m.duplicated(MATCH_KEY, keep=False).to_numpy()
+    if duplicated.any():
+        raise_issues(issue_rows(
+            df_m, duplicated, '경기기록', '/'.join(MATCH_KEY), '같은 경기가 여러 번 입력됨', '내용', match_key_text,
+        ))
+
+    df_m = df_m.sort_values('날짜', kind='stable').reset_index(drop=True)
+    df_m['match_id'] = np.arange(len(df_m))
+
+    linked = df_p[MATCH_KEY].merge(
+        df_m[MATCH_KEY + ['match_id']], on=MATCH_KEY, how='left', validate='many_to_one'
+    )
+    # 경기기록에 없는 선수 기록은 -1
+    df_p['match_id'] = linked['match_id'].fillna(-1).astype(int).to_numpy()
+    return df_p, df_m
+
+def select_matches(df_m, match_ids):
+    """match_id 목록에 해당하는 경기 행 추출 (merge 없이 위치 기반 마스크)"""
+    mask = np.zeros(len(df_m), dtype=bool)
+    match_ids = np.asarray(match_ids)
+    mask[match_ids[match_ids >= 0]] = True
+    return df_m[mask]
+
+# -----------------------------------------------------------------------------
+# 입력 검증 (불러올 때 한 번만, 결과는 Dataset.validation으로 같이 캐시)
+# -----------------------------------------------------------------------------
+# 형식: 전처리 전 원본 값 검사 (날짜/숫자/스코어), 행마다 독립적이라 증분 업데이트 때는 추가된 행만 검사
+# 내용: 전처리 후 기록끼리 대조 (음수, 경기기록에 없는 출전, 중복 출전, 스코어), 매번 전체를 다시 검사
+
+def issue_rows(df, mask, table, col, problem, kind, describe=None):
+    """mask에 해당하는 행마다 검증 보고서 한 줄 (행: CSV 줄 번호, 헤더가 1행)
+
+    값은 해당 컬럼 값, describe(해당 행들)를 넘기면 그 결과 (문제가 있는 행만 문자열로 변환), 없으면 None
+    """
+    if not mask.any():
+        return None
+    rows = df[mask]
+    values = rows[col] if describe is None else describe(rows)
+    lines = rows['행'].to_numpy() if '행' in df.columns else rows.index.to_numpy() + 2
+    hashes = rows['row_hash'].to_numpy() if 'row_hash' in df.columns else np.zeros(len(rows))
+    return pd.DataFrame({
+        '표': table,
+        '행': lines,
+        '컬럼': col,
+        '값': values.astype('string').fillna('').to_numpy(dtype=object),
+        '문제': problem,
+        '구분': kind,
+        'row_hash': hashes,
+    }).astype(ISSUE_DTYPES)
+
+def issue_report(parts):
+    """issue_rows() 결과들을 보고서 하나로 (문제가 없으면 빈 보고서)"""
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in ISSUE_DTYPES.items()})
+    return pd.concat(parts, ignore_index=True)
+
+def raise_issues(issues, limit=5):
+    """불러올 수 없는 오류는 줄 번호와 값을 붙여서 ValueError로 알림"""
+    first = issues.iloc[0]
+    lines = ", ".join(f"{row.행}행 '{row.값}'" for row in issues.head(limit).itertuples())
+    more = f" 외 {len(issues) - limit}건" if len(issues) > limit else ""
+    raise ValueError(f"{first['표']} {first['컬럼']}: {first['문제']} ({lines}{more})")
+
+def match_key_text(df):
+    """경기 키를 한 줄로 ("2025-03-01 U리그 1라운드 경일대")"""
+    text = df['날짜'].dt.strftime('%Y-%m-%d').fillna('')
+    for col in MATCH_KEY[1:]:
+        text = text + " " + df[col].astype('string').fillna('')
+    return text
+
+def check_values(df, table):
+    """파싱 직후(전처리 전) 원본 값 형식 검사
+
+    필수 컬럼이 없거나 연도가 정수가 아니면 ValueError, 나머지는 보고서로 반환합니다.
+    (잘못된 날짜는 빈 날짜, 숫자가 아닌 값은 0, 스코어를 읽을 수 없는 경기는 결과 없음으로 전처리)
+    """
+    missing = [col for col in REQUIRED_COLS[table] if col not in df.columns]
+    if missing:
+        raise ValueError(f"{table}에 필수 컬럼이 없습니다: {', '.join(missing)}")
+
+    years = pd.to_numeric(df['연도'], errors='coerce')
+    bad_years = (years.isna() | (years % 1 != 0)).to_numpy()
+    if bad_years.any():
+        raise_issues(issue_rows(df, bad_years, table, '연도', '연도가 정수가 아님', '형식'))
+
+    parts = [issue_rows(
+        df, pd.to_datetime(df['날짜'], errors='coerce').isna().to_numpy(), table, '날짜', '날짜 형식 오류', '형식',
+    )]
+    if table == '선수기록':
+        for col in NUMERIC_COLS:
+            if col not in df.columns:
+                continue
+            # 숫자로 못 읽은 칸 중 공백만 있는 칸은 빈 칸으로 봄
+            bad = (pd.to_numeric(df[col], errors='coerce').isna() & df[col].notna()).to_numpy()
+            if bad.any():
+                bad[bad] = df[col][bad].astype('string').str.strip().fillna('').to_numpy() != ''
+            parts.append(issue_rows(df, bad, table, col, '숫자가 아님 (0으로 처리)', '형식'))
+    else:
+        scores = df['스코어'].astype('string')
+        bad = ~scores.str.match(SCORE_PATTERN).fillna(False) & ~scores.str.strip().fillna('').isin(SCORE_EMPTY)
+        parts.append(issue_rows(df, bad.to_numpy(), table, '스코어', '스코어 형식 오류 (예: 2:1, 2:2(5PSO4))', '형식'))
+    return issue_report(parts)
+
+def check_records(df_p, df_m):
+    """전처리 후 기록 대조: 음수 기록, 경기기록에 없는 출전, 같은 경기 중복 출전, 승부차기/득점 합계와 스코어"""
+    parts = [
+        issue_rows(df_p, (df_p[col] < 0).to_numpy(), '선수기록', col, '음수 기록', '내용')
+        for col in NUMERIC_COLS if col in df_p.columns
+    ]
+    parts.append(issue_rows(
+        df_p, (df_p['match_id'] < 0).to_numpy(), '선수기록', '/'.join(MATCH_KEY), '경기기록에 없는 경기', '내용', match_key_text,
+    ))
+    parts.append(issue_rows(
+        df_p, df_p.duplicated(MATCH_KEY + ['선수명']).to_numpy(), '선수기록', '선수명', '같은 경기에 중복된 선수 기록', '내용',
+    ))
+
+    pso_draw = (df_m['팀득점'] == df_m['상대득점']).fillna(True).to_numpy()
+    parts.append(issue_rows(
+        df_m, df_m['승부차기'].to_numpy() & ~pso_draw, '경기기록', '스코어', '승부차기 스코어인데 무승부가 아님', '내용',
+    ))
+    # 선수 득점 합계가 팀 득점보다 많은 경기 (자책골이나 기록 누락으로 적은 경우는 정상)
+    linked = df_p['match_id'].to_numpy() >= 0
+    goals = np.bincount(
+        df_p['match_id'].to_numpy()[linked], weights=df_p['득점'].to_numpy()[linked], minlength=len(df_m),
+    ).astype('int64')
+    over = goals > df_m['팀득점'].fillna(np.iinfo('int64').max).to_numpy(dtype='int64')
+    parts.append(issue_rows(
+        df_m, over, '경기기록', '스코어', '선수기록 득점 합계가 팀 득점보다 많음', '내용',
+        lambda rows: rows['스코어'].astype('string') + " (선수 합계 " + pd.Series(goals[over], index=rows.index).astype('string') + ")",
+    ))
+    return issue_report(parts)
+
+def validate_dataset(df_p, df_m, value_issues=None):
+    """형식 검사 결과 + 기록 대조 결과를 표/줄 번호순으로 합친 검증 보고서
+
+    반환 컬럼: 표, 행, 컬럼, 값, 문제, 구분(형식/내용), row_hash (증분 업데이트 때 형식 검사 결과를 이어 쓰는 용도)
+    """
+    report = issue_report([value_issues, check_records(df_p, df_m)]).astype(ISSUE_DTYPES)
+    return report.sort_values(['표', '행', '컬럼', '문제'], kind='stable').reset_index(drop=True)
+
+def carry_value_issues(base, df, table):
+    """이전 보고서의 형식 검사 결과 중 아직 남아 있는 행 (줄 번호는 새 CSV 기준으로 갱신)"""
+    old = base.validation[((base.validation['구분'] == '형식') & (base.validation['표'] == table)).to_numpy()]
+    pos = pd.Index(df['row_hash']).get_indexer(old['row_hash'])
+    kept = old[pos >= 0].copy()
+    kept['행'] = df['행'].to_numpy()[pos[pos >= 0]]
+    return kept
+
+# -----------------------------------------------------------------------------
+# 사전 집계 / 필터 색인
+# -----------------------------------------------------------------------------
+
+def build_rollup(df_p):
+    """선수 기록을 필터 차원 단위로 미리 합산 (경기수, 선발 횟수 포함)"""
+    # 선수 기록은 int8로 줄여 두지만 합계는 넘칠 수 있으므로 int64로 집계
+    cube_src = df_p[ROLLUP_KEYS + ROLLUP_SUM_COLS].astype({col: 'int64' for col in ROLLUP_SUM_COLS}).assign(
+        경기수=1,
+        선발=(df_p['선발/교체'] == '선발').astype(int),
+    )
+    return cube_src.groupby(ROLLUP_KEYS, dropna=False, observed=True, sort=False).sum().reset_index()
+
+def update_rollup(df_rollup, removed_p, added_p):
+    """삭제된 행의 기여분은 빼고 추가된 행은 더해서 사전 집계 갱신"""
+    parts = [df_rollup]
+    if len(removed_p):
+        removed_cube = build_rollup(removed_p)
+        value_cols = removed_cube.columns.difference(ROLLUP_KEYS)
+        removed_cube[value_cols] = -removed_cube[value_cols]
+        parts.append(removed_cube)
+    if len(added_p):
+        parts.append(build_rollup(added_p))
+
+    cube = pd.concat(parts, ignore_index=True)
+    for col in ROLLUP_KEYS:
+        cube[col] = cube[col].astype(object)
+    cube = cube.groupby(ROLLUP_KEYS, dropna=False, sort=False).sum().reset_index()
+    cube = cube[cube['경기수'] > 0].reset_index(drop=True)
+    for col in ROLLUP_KEYS:
+        cube[col] = cube[col].astype('category')
+    return cube
+
+def build_filter_index(df, dims=FILTER_DIMS):
+    """필터 차원별 {값: 행 위치 배열} 역색인 생성"""
+    index = {}
+    for col in dims:
+        codes = df[col].cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        # 코드가 같은 행끼리 모여 있으므로 경계만 찾아서 잘라냄
+        bounds = np.searchsorted(codes[order], np.arange(len(df[col].cat.categories) + 1))
+        index[col] = {
+            value: order[bounds[i]:bounds[i + 1]]
+            for i, value in enumerate(df[col].cat.categories)
+            if bounds[i] < bounds[i + 1]
+        }
+    return index
+
+def index_mask(index, n_rows, selections):
+    """{차원: 선택값 목록}을 행 마스크로 변환 (같은 차원은 OR, 차원끼리는 AND)"""
+    mask = np.ones(n_rows, dtype=bool)
+    for col, values in selections.items():
+        if not values:
+            continue
+        dim_mask = np.zeros(n_rows, dtype=bool)
+        for value in values:
+            rows = index[col].get(value)
+            if rows is not None:
+                dim_mask[rows] = True
+        mask &= dim_mask
+    return mask
+
+def index_values(df, index, col, mask=None):
+    """필터 옵션 목록 (mask가 있으면 해당 행에 등장하는 값만)"""
+    if mask is None:
+        return sorted(index[col])
+    codes = np.unique(df[col].cat.codes.to_numpy()[mask])
+    categories = df[col].cat.categories
+    return sorted(categories[codes[codes >= 0]])
+
+# -----------------------------------------------------------------------------
+# 득점/도움 기록 (경기기록의 득점자/도움자 텍스트 분해)
+# -----------------------------------------------------------------------------
+
+def event_recorded(df_m, col):
+    """득점자/도움자 칸을 채운 경기 여부 ("-"도 '없음'으로 기록한 것으로 봄)"""
+    if col not in df_m.columns:
+        return np.zeros(len(df_m), dtype=bool)
+    return (df_m[col].astype('string').str.strip().fillna('') != '').to_numpy()
+
+def build_goal_events(df_m):
+    """득점자/도움자 텍스트를 (match_id, 선수명, 구분, 횟수) 행으로 분해
+
+    "김경민(2), 최규현" -> (김경민, 2), (최규현, 1). 같은 경기에 같은 선수가 두 번 적혀 있으면 합산합니다.
+    """
+    parts = []
+    for col, kind in EVENT_COLS.items():
+        if col not in df_m.columns:
+            continue
+        # 쉼표로 나눈 이름마다 한 행 (explode 후 인덱스 = 경기 행 위치)
+        names = df_m[col].astype('string').str.split(',').explode().str.strip()
+        names = names[names.notna() & ~names.isin(EVENT_EMPTY)]
+        fields = names.str.extract(EVENT_PATTERN)
+        parts.append(pd.DataFrame({
+            'match_id': df_m['match_id'].to_numpy()[names.index.to_numpy()],
+            '선수명': fields['선수명'].to_numpy(),
+            '구분': kind,
+            '횟수': pd.to_numeric(fields['횟수']).fillna(1).to_numpy(),
+        }))
+    if not parts:
+        events = pd.DataFrame({'match_id': [], '선수명': [], '구분': [], '횟수': []})
+    else:
+        events = pd.concat(parts, ignore_index=True)
+    events = (
+        events.dropna(subset=['선수명'])
+        .groupby(['match_id', '선수명', '구분'], sort=True)['횟수'].sum()
+        .reset_index()
+    )
+    events['match_id'] = events['match_id'].astype(int)
+    events['횟수'] = pd.to_numeric(events['횟수'], downcast='integer')
+    for col in ['선수명', '구분']:
+        events[col] = events[col].astype('category')
+    return events
+
+def check_goal_events(events, df_p, df_m):
+    """득점자/도움자 합계와 선수기록 득점/도움이 다른 (경기, 선수) 목록
+
+    득점자/도움자 칸이 비어 있는 경기는 기록하지 않은 것으로 보고 비교하지 않습니다.
+    반환 컬럼: 날짜, 대회명, 상대팀, 선수명, 구분, 경기기록, 선수기록
+    """
+    linked = df_p[df_p['match_id'] >= 0]
+    parts = []
+    for col, kind in EVENT_COLS.items():
+        if kind not in df_p.columns:
+            continue
+        recorded = np.flatnonzero(event_recorded(df_m, col))
+        listed = events[(events['구분'] == kind).to_numpy() & events['match_id'].isin(recorded).to_numpy()]
+        players = linked[linked['match_id'].isin(recorded)]
+        both = pd.concat([
+            listed.assign(선수명=listed['선수명'].astype(str))
+                .groupby(['match_id', '선수명'])['횟수'].sum().rename('경기기록'),
+            players.assign(선수명=players['선수명'].astype(str))
+                .groupby(['match_id', '선수명'])[kind].sum().rename('선수기록'),
+        ], axis=1).fillna(0).astype(int)
+        parts.append(both[both['경기기록'] != both['선수기록']].reset_index().assign(구분=kind))
+
+    cols = ['match_id', '선수명', '구분', '경기기록', '선수기록']
+    mismatches = pd.concat(parts, ignore_index=True)[cols] if parts else pd.DataFrame(columns=cols)
+    match_ids = mismatches['match_id'].to_numpy(dtype=int)
+    info = df_m[['날짜', '대회명', '상대팀']].iloc[match_ids].reset_index(drop=True)
+    return pd.concat([info, mismatches.reset_index(drop=True)], axis=1).sort_values(
+        ['match_id', '선수명'], kind='stable'
+    ).drop(columns='match_id').reset_index(drop=True)
+
+# -----------------------------------------------------------------------------
+# 경기 흐름 (최근 N경기 폼 / 연속 기록 / 누적 기록)
+# -----------------------------------------------------------------------------
+
+def running_stats(rows, group, sums, streaks, window=FORM_WINDOW, base=None):
+    """날짜순 rows에 그룹별 누적X, 최근X (최근 window경기 합), 연속 기록 컬럼 추가
+
+    group이 None이면 전체를 한 흐름으로 계산합니다 (팀).
+    base에 이전 결과를 넘기면 rows는 그 뒤에 이어지는 경기로 보고, 그룹별 마지막 window행과
+    누적/연속 값만 이어받아 새 행만 계산한 뒤 base 뒤에 붙여서 반환합니다 (증분 업데이트).
+    """
+    if base is not None and len(base) and not len(rows):
+        return base
+    if base is not None and len(base):
+        context = base if group is None else base[base[group].isin(rows[group])]
+        context = context.tail(window) if group is None else context.groupby(group, sort=False).tail(window)
+        rows = concat_categorical([context, rows])
+        n_context = len(context)
+    else:
+        rows = rows.reset_index(drop=True)
+        n_context = 0
+
+    key = np.zeros(len(rows), dtype=int) if group is None else pd.factorize(rows[group])[0]
+    # 문맥 행 중 그룹 첫 행에서 이전 누적/연속 값을 이어받음
+    carry_row = (rows.groupby(key, sort=False).cumcount() == 0).to_numpy() & (np.arange(len(rows)) < n_context)
+    rows = rows.copy()
+    for col in sums:
+        raw = rows[col].astype('int64')
+        start = (rows[f"누적{col}"] - raw).where(carry_row, 0) if n_context else 0
+        cum = (raw + start).groupby(key, sort=False).cumsum()
+        # 최근 window경기 합 = 지금 누적 - window경기 전 누적 (그보다 짧으면 처음부터)
+        lag = cum.groupby(key, sort=False).shift(window)
+        rows[f"누적{col}"] = cum.astype('int64')
+        rows[f"최근{col}"] = (cum - lag.fillna(0)).astype('int64')
+    for name, flag_col in streaks.items():
+        flag = rows[flag_col].astype(bool)
+        run = (~flag).astype(int).groupby(key, sort=False).cumsum()
+        streak = flag.astype('int64').groupby([key, run.to_numpy()], sort=False).cumsum()
+        if n_context:
+            # 첫 끊김 전까지는 이전 연속 기록에 이어서 셈
+            carry = (rows[name] - flag.astype('int64')).where(carry_row, 0)
+            streak = streak + carry.groupby(key, sort=False).transform('sum').where(run == 0, 0)
+        rows[name] = streak.astype('int64')
+
+    if base is None or not len(base):
+        return rows
+    return concat_categorical([base, rows.iloc[n_context:]])
+
+def team_form_rows(matches):
+    """경기 목록 -> 흐름 계산용 팀 기록 (날짜순)"""
+    m = matches.sort_values('match_id', kind='stable')
+    return pd.DataFrame({
+        'match_id': m['match_id'].to_numpy(),
+        '날짜': m['날짜'].to_numpy(),
+        '대회명': m['대회명'].to_numpy(),
+        '상대팀': m['상대팀'].to_numpy(),
+        '결과': m['결과'].to_numpy(),
+        '득점': m['팀득점'].fillna(0).to_numpy(dtype='int64'),
+        '실점': m['상대득점'].fillna(0).to_numpy(dtype='int64'),
+        '승점': m['결과'].map(POINTS).fillna(0).to_numpy(dtype='int64'),
+        '무패경기': m['결과'].isin(['승', '무']).to_numpy(),
+        '득점경기': (m['팀득점'].fillna(0) > 0).to_numpy(),
+    })
+
+def player_form_rows(df_p):
+    """선수 기록 -> 흐름 계산용 선수별 기록 (날짜순)"""
+    # 선수명 카테고리는 가나다순이므로 같은 경기 안에서는 이름순 (증분/전체 계산 결과가 같도록)
+    p = df_p.sort_values(['날짜', 'match_id', '선수명'], kind='stable')
+    return pd.DataFrame({
+        '선수명': p['선수명'].array,
+        'match_id': p['match_id'].to_numpy(),
+        '날짜': p['날짜'].to_numpy(),
+        '대회명': p['대회명'].array,
+        '상대팀': p['상대팀'].array,
+        '경기': np.ones(len(p), dtype='int64'),
+        '득점': p['득점'].to_numpy(dtype='int64'),
+        '도움': p['도움'].to_numpy(dtype='int64'),
+        '출전시간': p['출전시간'].to_numpy(dtype='int64'),
+        '득점경기': (p['득점'] > 0).to_numpy(),
+    })
+
+def build_team_timeline(df_p, df_m, base=None):
+    """선수 기록이 있는 경기 전체의 팀 흐름 (base가 있으면 그 뒤 경기만 계산해서 이어 붙임)"""
+    rows = team_form_rows(select_matches(df_m, df_p['match_id'].to_numpy()))
+    if base is not None:
+        rows = rows[rows['match_id'] > base['match_id'].max()]
+    return running_stats(rows, None, TEAM_FORM_SUMS, TEAM_FORM_STREAKS, base=base)
+
+def build_player_timeline(df_p, base=None):
+    """선수별 통산 흐름 (base가 있으면 df_p는 새로 추가된 기록만)"""
+    return running_stats(player_form_rows(df_p), '선수명', PLAYER_FORM_SUMS, PLAYER_FORM_STREAKS, base=base)
+
+def update_timelines(base, df_p, df_m, removed_p, removed_m, added_p):
+    """증분 업데이트 시 기존 경기 뒤에 새 경기만 추가된 경우 흐름을 이어서 계산
+
+    수정/삭제가 있거나 기존 마지막 경기 날짜 이전(같은 날 포함) 기록이 들어오면 (None, None) -> 전체 재계산
+    (스냅샷/번들에서 읽은 base는 선수별 흐름이 없으므로 항상 전체 재계산)
+    """
+    if base.player_timeline is None or len(removed_p) or len(removed_m) or not len(base.player_timeline):
+        return None, None
+    if len(added_p) and not added_p['날짜'].min() > base.player_timeline['날짜'].max():
+        return None, None
+    # 새 기록은 df_p 끝에 붙어 있음 (diff_rows 참고), match_id는 기존 경기 그대로 유지됨
+    new_p = df_p.iloc[len(df_p) - len(added_p):]
+    linked = select_matches(df_m, df_p['match_id'].to_numpy())['match_id']
+    known = base.team_timeline['match_id']
+    if not np.array_equal(np.sort(linked[linked.isin(known)].to_numpy()), np.sort(known.to_numpy())):
+        return None, None
+    if (linked[~linked.isin(known)] < known.max()).any():
+        return None, None
+    return build_team_timeline(df_p, df_m, base.team_timeline), build_player_timeline(new_p, base.player_timeline)
+
+# -----------------------------------------------------------------------------
+# 상대 전적 (상대팀별 통산 / 연도별 / 득점 선수)
+# -----------------------------------------------------------------------------
+
+def result_counts(m):
+    """경기 목록에 승/무/패, 승부차기 승/패 여부 컬럼 추가 (groupby 합산용)"""
+    shootout = m['승부차기'].astype(bool)
+    return m.assign(
+        승=m['결과'].eq('승').fillna(False).astype(int),
+        무=m['결과'].eq('무').fillna(False).astype(int),
+        패=m['결과'].eq('패').fillna(False).astype(int),
+        승부차기승=(shootout & (m['PSO팀'] > m['PSO상대']).fillna(False)).astype(int),
+        승부차기패=(shootout & (m['PSO팀'] < m['PSO상대']).fillna(False)).astype(int),
+    )
+
+OPPONENT_AGG = {
+    '경기수': ('match_id', 'size'),
+    '승': ('승', 'sum'),
+    '무': ('무', 'sum'),
+    '패': ('패', 'sum'),
+    '득점': ('팀득점', 'sum'),
+    '실점': ('상대득점', 'sum'),
+    '승부차기승': ('승부차기승', 'sum'),
+    '승부차기패': ('승부차기패', 'sum'),
+}
+
+def build_opponent_tables(df_p, df_m, df_rollup):
+    """상대팀별 전적 표 3개 (선수 기록이 있는 경기 기준, team_summary와 같음)
+
+    opponent_table   상대팀 인덱스: 경기수, 승/무/패, 득점/실점, 승부차기 승/패, 최근 경기
+    opponent_yearly  (상대팀, 연도) 인덱스: 같은 항목의 연도별 합계
+    opponent_scorers (상대팀, 선수명) 인덱스: 해당 상대로 넣은 득점/도움 (상대팀별 득점 많은 순)
+    """
+    m = result_counts(select_matches(df_m, df_p['match_id'].to_numpy()))
+    table = m.groupby('상대팀').agg(**OPPONENT_AGG)
+    # 날짜를 읽지 못한 경기(NaT)는 match_id가 맨 뒤라서 최근 경기에서 제외
+    last = m[m['날짜'].notna()].sort_values('match_id').groupby('상대팀').tail(1).set_index('상대팀')
+    last = last[['날짜', '대회명', '라운드', '스코어', '결과']].add_prefix('최근')
+    table = table.join(last)
+
+    yearly = m.groupby(['상대팀', '연도']).agg(**OPPONENT_AGG).sort_index()
+
+    scorers = df_rollup.groupby(['상대팀', '선수명'], observed=True)[['득점', '도움']].sum().reset_index()
+    scorers = scorers[scorers['득점'] > 0].astype({'상대팀': str, '선수명': str})
+    scorers = scorers.sort_values(['상대팀', '득점', '도움', '선수명'], ascending=[True, False, False, True])
+    scorers = scorers.set_index(['상대팀', '선수명'])
+    return table, yearly, scorers
+
+def build_dataset(df_p, df_m, df_rollup, player_header=None, match_header=None, changes=None,
+                  value_issues=None, validation=None, goal_events=None, goal_mismatches=None, team_timeline=None, player_timeline=None,
+                  opponent_tables=None, seasons=None):
+    """프레임과 사전 집계로 Dataset 구성 (필터 색인, 득점 기록, 경기 흐름, 상대 전적은 여기서 생성)
+
+    득점 기록 / 경기 흐름 / 상대 전적을 넘기면 (정적 번들, 증분 업데이트) 다시 계산하지 않습니다.
+    검증 보고서(validation)도 마찬가지이며, 없으면 value_issues(형식 검사 결과)에 기록 대조 결과를 더해서 만듭니다.
+    선수 기록 대신 seasons(연도별 파티션)를 넘길 때는 선수별 경기 흐름을 뺀 위 결과를 모두 같이 넘겨야 합니다.
+    """
+    if validation is None:
+        with stage("기록 대조"):
+            validation = validate_dataset(df_p, df_m, value_issues)
+    if goal_events is None or goal_mismatches is None:
+        with stage("득점 기록"):
+            goal_events = build_goal_events(df_m)
+            goal_mismatches = check_goal_events(goal_events, df_p, df_m)
+    if team_timeline is None or (player_timeline is None and df_p is not None):
+        with stage("경기 흐름"):
+            team_timeline = build_team_timeline(df_p, df_m)
+            player_timeline = build_player_timeline(df_p)
+    if opponent_tables is None:
+        with stage("상대 전적"):
+            opponent_tables = build_opponent_tables(df_p, df_m, df_rollup)
+    opponent_table, opponent_yearly, opponent_scorers = opponent_tables
+    return Dataset(
+        player=df_p,
+        match=df_m,
+        rollup=df_rollup,
+        player_index=build_filter_index(df_p) if df_p is not None else None,
+        rollup_index=build_filter_index(df_rollup),
+        validation=validation,
+        goal_events=goal_events,
+        goal_index=build_filter_index(goal_events, ['선수명', '구분']),
+        goal_mismatches=goal_mismatches,
+        team_timeline=team_timeline,
+        player_timeline=player_timeline,
+        opponent_table=opponent_table,
+        opponent_yearly=opponent_yearly,
+        opponent_scorers=opponent_scorers,
+        player_header=player_header,
+        match_header=match_header,
+        changes=changes,
+        seasons=seasons,
+    )
+
+# -----------------------------------------------------------------------------
+# CSV 로드 / 증분 반영
+# -----------------------------------------------------------------------------
+
+def csv_digest(player_csv, match_csv):
+    """원본 CSV 텍스트의 내용 해시 (캐시 키)"""
+    h = hashlib.sha256()
+    h.update(player_csv.encode("utf-8"))
+    h.update(b"\0")
+    h.update(match_csv.encode("utf-8"))
+    return h.hexdigest()
+
+def split_csv_rows(csv_text):
+    """CSV 텍스트를 헤더와 데이터 행 목록으로 분리 (빈 줄 제외)"""
+    lines = [line for line in csv_text.splitlines() if line.strip()]
+    if not lines:
+        return "", []
+    return lines[0], lines[1:]
+
+def parse_rows(header, rows):
+    """헤더 + 일부 행만 모아서 DataFrame으로 파싱
+
+    라운드 "1"처럼 숫자로 보이는 글자 컬럼도 항상 문자열로 읽습니다.
+    (추론에 맡기면 증분 업데이트 때 바뀐 행만 읽은 결과와 전체를 읽은 결과의 타입이 달라짐)
+    """
+    columns = pd.read_csv(io.StringIO(header), nrows=0).columns
+    text_cols = {col: str for col in columns if col not in PARSED_NUMERIC_COLS}
+    return pd.read_csv(io.StringIO("\n".join([header] + rows)), dtype=text_cols)
+
+def hash_rows(rows):
+    """행 텍스트별 해시 (똑같은 행이 여러 번 있으면 등장 순번까지 포함)"""
+    hashes = pd.util.hash_array(np.array(rows, dtype=object))
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'row': hashes, 'n': occurrence}), index=False
+    ).to_numpy()
+
+def concat_categorical(frames):
+    """행 방향 concat (category 컬럼은 concat하면 object가 되므로 카테고리를 합쳐서 복원)"""
+    # 빈 프레임은 컬럼 타입이 정해지지 않았을 수 있으므로 제외
+    frames = [df for df in frames if len(df)] or frames[:1]
+    merged = pd.concat(frames, ignore_index=True)
+    for col in merged.columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            merged[col] = union_categoricals([df[col] for df in frames], sort_categories=True)
+    return merged
+
+def diff_rows(base_df, header, rows, preprocess, table):
+    """기존 프레임과 새 CSV 행을 비교해서 바뀐 행만 파싱/검사/반영
+
+    반환값: (갱신된 프레임, 삭제된 행, 추가된 행, 추가된 행의 형식 검사 결과)
+    줄 단위로 비교할 수 없는 행이 있으면 None (전체 다시 읽기)
+    """
+    hashes = hash_rows(rows)
+    base_hashes = base_df['row_hash'].to_numpy()
+    keep = np.isin(base_hashes, hashes)
+    new_pos = np.flatnonzero(~np.isin(hashes, base_hashes))
+
+    removed = base_df[~keep]
+    # 앞쪽 행이 추가/삭제되면 남은 행의 줄 번호도 바뀌므로 새 CSV 기준으로 다시 매김
+    kept = base_df[keep].assign(행=pd.Index(hashes).get_indexer(base_hashes[keep]) + 2)
+    if len(new_pos) == 0:
+        return kept.reset_index(drop=True), removed, kept.iloc[0:0], None
+
+    added = parse_rows(header, [rows[i] for i in new_pos])
+    # 따옴표 안 줄바꿈(엑셀 Alt+Enter)이 있으면 한 행이 여러 줄에 걸치므로 줄 수와 행 수가 다름
+    if len(added) != len(new_pos):
+        return None
+    added['행'] = new_pos + 2
+    added['row_hash'] = hashes[new_pos]
+    issues = check_values(added, table)
+    added = preprocess(added)
+    # 숫자 컬럼 정수 타입은 전체 값 범위로 다시 정함 (전체 다시 읽기와 같은 타입)
+    merged = concat_categorical([kept, added])
+    merged = downcast_ints(merged, [col for col in NUMERIC_COLS if col in merged and pd.api.types.is_numeric_dtype(merged[col])])
+    return merged, removed, added, issues
+
+def summarize_changes(removed, added, key):
+    """키 기준 추가/수정/삭제 건수 (양쪽에 다 있는 키는 수정)"""
+    old_keys = set(removed[key].itertuples(index=False, name=None))
+    new_keys = set(added[key].itertuples(index=False, name=None))
+    return {
+        '추가': len(new_keys - old_keys),
+        '수정': len(new_keys & old_keys),
+        '삭제': len(old_keys - new_keys),
+    }
+
+def apply_changes(base, player_header, player_rows, match_header, match_rows):
+    """이전 데이터셋에 바뀐 행만 반영 (증분 업데이트, 바뀐 행을 줄 단위로 읽을 수 없으면 None)"""
+    diff_p = diff_rows(season_rows(base)[0], player_header, player_rows, preprocess_player, '선수기록')
+    diff_m = diff_rows(base.match, match_header, match_rows, preprocess_match, '경기기록')
+    if diff_p is None or diff_m is None:
+        return None
+    df_p, removed_p, added_p, issues_p = diff_p
+    df_m, removed_m, added_m, issues_m = diff_m
+    df_p, df_m = assign_match_ids(df_p, df_m)
+    value_issues = issue_report([
+        carry_value_issues(base, df_p, '선수기록'), carry_value_issues(base, df_m, '경기기록'), issues_p, issues_m,
+    ])
+
+    changes = {
+        '경기': summarize_changes(removed_m, added_m, MATCH_KEY),
+        '선수 기록': summarize_changes(removed_p, added_p, MATCH_KEY + ['선수명']),
+    }
+    df_rollup = update_rollup(base.rollup, removed_p, added_p)
+    team_timeline, player_timeline = update_timelines(base, df_p, df_m, removed_p, removed_m, added_p)
+    return build_dataset(
+        df_p, df_m, df_rollup, player_header, match_header, changes, value_issues,
+        team_timeline=team_timeline, player_timeline=player_timeline,
+    )
+
+def load_csv_text(player_csv, match_csv, base=None):
+    """CSV 텍스트 -> Dataset
+
+    base(이전 Dataset)를 넘기면 헤더가 같을 때 바뀐 행만 파싱해서 반영합니다.
+    (바뀐 행에 여러 줄에 걸친 칸이 있으면 전체를 다시 읽음)
+    """
+    with stage("CSV 파싱"):
+        player_header, player_rows = split_csv_rows(player_csv)
+        match_header, match_rows = split_csv_rows(match_csv)
+
+        if base is not None and base.player_header == player_header and base.match_header == match_header:
+            with stage("증분 반영"):
+                ds = apply_changes(base, player_header, player_rows, match_header, match_rows)
+            if ds is not None:
+                return ds
+
+        df_p, df_m = parse_rows(player_header, player_rows), parse_rows(match_header, match_rows)
+        # 검증 보고서용 CSV 줄 번호 (헤더가 1행, 빈 줄은 세지 않음)
+        df_p['행'] = np.arange(2, len(df_p) + 2)
+        df_m['행'] = np.arange(2, len(df_m) + 2)
+        # 따옴표 안 줄바꿈처럼 행 수가 어긋나면 행 해시를 만들 수 없으므로 증분 업데이트 비활성화
+        if len(df_p) == len(player_rows) and len(df_m) == len(match_rows):
+            df_p['row_hash'] = hash_rows(player_rows)
+            df_m['row_hash'] = hash_rows(match_rows)
+        else:
+            player_header = match_header = None
+
+    with stage("형식 검사"):
+        value_issues = issue_report([check_values(df_p, '선수기록'), check_values(df_m, '경기기록')])
+    with stage("전처리"):
+        df_p, df_m = preprocess_data(df_p, df_m)
+    with stage("사전 집계"):
+        df_rollup = build_rollup(df_p)
+    with stage("필터 색인"):
+        return build_dataset(df_p, df_m, df_rollup, player_header, match_header, value_issues=value_issues)
+
+def load_csv_files(player_path, match_path):
+    """CSV 파일 경로 -> (data_key, Dataset)"""
+    with open(player_path, "r", encoding="utf-8") as f:
+        player_csv = f.read()
+    with open(match_path, "r", encoding="utf-8") as f:
+        match_csv = f.read()
+    return csv_digest(player_csv, match_csv), load_csv_text(player_csv, match_csv)
+
+# -----------------------------------------------------------------------------
+# 연도별 파티션 (선수 기록을 연도 단위로 나눠 저장하고 필요한 연도만 읽음)
+# -----------------------------------------------------------------------------
+# 전체 연도 화면(필터바 옵션, 팀 기록, 랭킹, 선수 합계)은 사전 집계와 경기기록만으로 계산하므로
+# 선수 출전 기록은 Match Log처럼 행이 필요한 조회에서 처음 쓸 때 해당 연도만 읽습니다.
+
+def parallel_map(fn, items):
+    """items마다 fn을 스레드 풀에서 동시에 실행, 결과는 items 순서 (브라우저처럼 스레드가 없으면 차례로)"""
+    items = list(items)
+    if len(items) <= 1 or sys.platform == "emscripten":
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), PARTITION_WORKERS)) as pool:
+        return list(pool.map(fn, items))
+
+def partition_years(df_p):
+    """선수 기록을 나눠 저장할 연도 목록"""
+    return sorted(int(year) for year in df_p['연도'].unique())
+
+def split_seasons(df_p):
+    """선수 기록 -> [(연도, 해당 연도 행)] (행 순서와 인덱스는 원래대로 유지해서 합쳤을 때 같은 프레임이 되도록)"""
+    return [(int(year), rows) for year, rows in df_p.groupby('연도', observed=True, sort=True)]
+
+def partition_frames(df_p):
+    """저장할 파티션 [(이름, 행)], 연도별 파티션 뒤에 빈 파티션(EMPTY_PARTITION)을 붙임"""
+    return split_seasons(df_p) + [(EMPTY_PARTITION, df_p.iloc[0:0])]
+
+class SeasonPartitions:
+    """연도별로 나눠 저장한 선수 기록 (읽은 연도는 보관, 연도 조합별 프레임/색인은 최근 몇 개만 보관)
+
+        seasons = SeasonPartitions([2024, 2025], read)  # read(연도 또는 EMPTY_PARTITION) -> 해당 파티션
+        rows, index = seasons.rows((2025,))            # 2025 파티션만 읽음
+    """
+
+    def __init__(self, years, read, max_views=SEASON_VIEWS):
+        self.years = sorted(years)
+        self.max_views = max_views
+        self._read = read
+        self._frames = {}
+        self._views = OrderedDict()  # 연도 tuple -> (선수 기록, 필터 색인)
+        self._lock = threading.Lock()
+
+    def rows(self, years=()):
+        """years 연도의 (선수 기록, 필터 색인), 비어 있으면 전체 연도"""
+        key = tuple(year for year in self.years if year in years) if years else tuple(self.years)
+        if not key:
+            # 저장된 연도가 아니거나 선수 기록이 없으면 빈 파티션
+            key = (EMPTY_PARTITION,)
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+            missing = [year for year in key if year not in self._frames]
+
+        # 아직 읽지 않은 연도만 동시에 읽음 (다른 세션과 겹치면 같은 파티션을 두 번 읽을 수 있지만 결과는 같음)
+        with stage("연도별 기록 읽기"):
+            loaded = parallel_map(self._read, missing)
+        with self._lock:
+            self._frames.update(zip(missing, loaded))
+            frames = [self._frames[year] for year in key]
+
+        rows = pd.concat(frames)
+        for col in FILTER_DIMS:
+            if not isinstance(rows[col].dtype, pd.CategoricalDtype):
+                rows[col] = rows[col].astype('category')
+        view = (rows, build_filter_index(rows))
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return view
+
+def season_rows(ds: Dataset, years=()):
+    """(선수 기록, 필터 색인), 연도별 파티션에서 읽은 데이터면 years 연도만 (비어 있으면 전체)"""
+    if ds.seasons is None:
+        return ds.player, ds.player_index
+    return ds.seasons.rows(years)
+
+def restore_dataset(frames, seasons, player_header, match_header, aggregates=None):
+    """스냅샷/번들에 저장한 프레임으로 Dataset 복원 (다시 계산하는 것은 필터 색인뿐)"""
+    ds = build_dataset(
+        None, frames['match'], frames['rollup'], player_header, match_header,
+        validation=frames['validation'],
+        goal_events=frames['goal_events'], goal_mismatches=frames['goal_mismatches'],
+        team_timeline=frames['team_timeline'],
+        opponent_tables=(frames['opponent_table'], frames['opponent_yearly'], frames['opponent_scorers']),
+        seasons=seasons,
+    )
+    ds.aggregates = aggregates
+    return ds
+
+# -----------------------------------------------------------------------------
+# 스냅샷 (Parquet)
+# -----------------------------------------------------------------------------
+
+def load_snapshot(snapshot_dir, data_key):
+    """data_key에 해당하는 스냅샷이 있으면 읽어서 Dataset으로 복원 (없거나 복원하지 못하면 None)
+
+    스냅샷은 CSV에서 언제든 다시 만들 수 있는 캐시라서, 형식이 예전 것이거나 복원하다 실패하면
+    지우고 None을 반환합니다. 호출하는 쪽은 CSV를 다시 파싱하고 새 스냅샷을 저장합니다.
+    """
+    with stage("스냅샷 로드"):
+        try:
+            ds = _load_snapshot(snapshot_dir, data_key)
+        except Exception:
+            ds = None
+        if ds is None:
+            shutil.rmtree(os.path.join(snapshot_dir, data_key[:16]), ignore_errors=True)
+        return ds
+
+def category_columns(df):
+    """category 타입 컬럼 목록 (스냅샷 meta에 기록)"""
+    return [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+def restore_categories(df, cols):
+    """category_columns()로 기록한 컬럼을 다시 category로 변환
+
+    Parquet은 값이 있는 문자열 category만 그대로 복원하므로 연도 같은 숫자 category나
+    빈 표(득점자 칸이 없는 경기기록 등)의 category는 여기서 다시 맞춥니다.
+    """
+    for col in cols:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def _load_snapshot(snapshot_dir, data_key):
+    path = os.path.join(snapshot_dir, data_key[:16])
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta['data_key'] != data_key or meta.get('snapshot_version') != SNAPSHOT_VERSION:
+            return None
+        tables = parallel_map(
+            lambda name: pd.read_parquet(os.path.join(path, f"{name}.parquet"), memory_map=True), SNAPSHOT_FRAMES,
+        )
+    except (OSError, ValueError, KeyError, ImportError):
+        return None
+    frames = dict(zip(SNAPSHOT_FRAMES, tables))
+    for name, df in frames.items():
+        restore_categories(df, meta['categories'][name])
+
+    # 선수 기록은 처음 필요할 때 해당 연도 파일만 읽음
+    # (현재 버전 스냅샷은 항상 최근 SNAPSHOT_KEEP개 안에 있으므로 나중에 읽어도 지워져 있지 않음)
+    def read_year(year):
+        rows = pd.read_parquet(os.path.join(path, f"player-{year}.parquet"), memory_map=True)
+        return restore_categories(rows, meta['categories']['player'])
+
+    seasons = SeasonPartitions(meta['player_years'], read_year)
+    return restore_dataset(frames, seasons, meta['player_header'], meta['match_header'])
+
+def save_snapshot(snapshot_dir, data_key, ds):
+    """Dataset을 스냅샷으로 저장 (쓰기 실패는 무시, 화면 표시에는 영향 없음)"""
+    with stage("스냅샷 저장"):
+        _save_snapshot(snapshot_dir, data_key, ds)
+
+def _save_snapshot(snapshot_dir, data_key, ds):
+    path = os.path.join(snapshot_dir, data_key[:16])
+    if os.path.isdir(path):
+        return
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in SNAPSHOT_FRAMES:
+            # 상대 전적처럼 인덱스가 있는 표는 인덱스까지 저장
+            getattr(ds, name).to_parquet(os.path.join(tmp_path, f"{name}.parquet"))
+        partitions = partition_frames(season_rows(ds)[0])
+        for name, rows in partitions:
+            rows.to_parquet(os.path.join(tmp_path, f"player-{name}.parquet"))
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                'data_key': data_key,
+                'snapshot_version': SNAPSHOT_VERSION,
+                'player_header': ds.player_header,
+                'match_header': ds.match_header,
+                'player_years': [name for name, _ in partitions[:-1]],
+                'categories': {
+                    **{name: category_columns(getattr(ds, name)) for name in SNAPSHOT_FRAMES},
+                    'player': category_columns(partitions[-1][1]),
+                },
+            }, f, ensure_ascii=False)
+        # 다 쓴 뒤에 이름을 바꿔서 읽는 쪽이 반쯤 쓰인 스냅샷을 보지 않도록 함
+        os.replace(tmp_path, path)
+
+        snapshots = sorted(
+            (os.path.join(snapshot_dir, d) for d in os.listdir(snapshot_dir)
+             if '.tmp-' not in d and os.path.isdir(os.path.join(snapshot_dir, d))),
+            key=os.path.getmtime, reverse=True,
+        )
+        for old_path in snapshots[SNAPSHOT_KEEP:]:
+            shutil.rmtree(old_path, ignore_errors=True)
+    except (OSError, ImportError):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def write_text(path, text):
+    """임시 파일에 다 쓴 뒤 이름을 바꿔서 저장 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def save_current(snapshot_dir, data_key, player_csv, match_csv):
+    """공개한 버전의 CSV를 저장하고 현재 버전으로 기록, (선수기록 CSV 경로, 경기기록 CSV 경로) 반환 (실패하면 None)
+
+    CURRENT_FILE에는 data_key와 파일 이름만 적으므로 재시작할 때는 이 작은 파일과 스냅샷만 읽고,
+    CSV 원문은 편집창을 열거나 스냅샷을 다시 만들어야 할 때만 읽습니다.
+    """
+    names = (f"data-{data_key[:16]}-player.csv", f"data-{data_key[:16]}-match.csv")
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        # CSV를 먼저 다 쓰고 CURRENT_FILE을 바꿔야 재시작할 때 없는 파일을 가리키지 않음
+        for name, text in zip(names, (player_csv, match_csv)):
+            write_text(os.path.join(snapshot_dir, name), text)
+        write_text(os.path.join(snapshot_dir, CURRENT_FILE), json.dumps(
+            {'data_key': data_key, 'player_csv': names[0], 'match_csv': names[1]}, ensure_ascii=False,
+        ))
+        # 이전에 공개한 버전의 CSV 정리
+        for name in os.listdir(snapshot_dir):
+            if name.startswith("data-") and '.tmp-' not in name and name not in names:
+                os.remove(os.path.join(snapshot_dir, name))
+    except OSError:
+        return None
+    return tuple(os.path.join(snapshot_dir, name) for name in names)
+
+def load_current(snapshot_dir):
+    """save_current()로 기록한 (data_key, 선수기록 CSV 경로, 경기기록 CSV 경로), 없거나 CSV 파일이 없으면 None"""
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            current = json.load(f)
+        paths = tuple(os.path.join(snapshot_dir, current[col]) for col in ('player_csv', 'match_csv'))
+        data_key = current['data_key']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not all(os.path.isfile(path) for path in paths):
+        return None
+    return (data_key,) + paths
+
+# -----------------------------------------------------------------------------
+# 정적 번들 (stlite/Pyodide 시작 속도용)
+# -----------------------------------------------------------------------------
+# 브라우저에는 pyarrow가 없을 수 있으므로 numpy .npz 한 파일에 컬럼별 배열로 저장합니다.
+# 문자열 컬럼은 (코드, 값 목록)으로 사전 인코딩해서 크기를 줄이고 pickle 없이 읽습니다.
+
+def encode_column(series, arrays):
+    """컬럼 하나를 배열로 바꿔 arrays에 추가하고 복원 정보(dict) 반환"""
+    spec = {'name': series.name, 'dtype': str(series.dtype)}
+    if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        values = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+        spec['kind'] = 'category' if isinstance(series.dtype, pd.CategoricalDtype) else 'text'
+        arrays.append(values.cat.codes.to_numpy())
+        arrays.append(np.asarray(values.cat.categories.tolist()))
+    elif pd.api.types.is_datetime64_dtype(series.dtype):
+        spec['kind'] = 'datetime'
+        spec['unit'] = np.datetime_data(series.dtype)[0]
+        arrays.append(series.to_numpy().view('int64'))
+    elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        # Int64 같은 nullable 타입: 값 + 결측 마스크
+        spec['kind'] = 'masked'
+        arrays.append(series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+        arrays.append(series.isna().to_numpy())
+    else:
+        spec['kind'] = 'plain'
+        arrays.append(series.to_numpy())
+    return spec
+
+def decode_column(spec, arrays):
+    """encode_column()의 역변환, arrays에서 사용한 만큼 꺼냄"""
+    kind = spec['kind']
+    if kind in ('category', 'text'):
+        codes, categories = arrays.pop(0), arrays.pop(0)
+        values = pd.Categorical.from_codes(codes, categories=pd.Index(categories.tolist()))
+        if kind == 'category':
+            return pd.Series(values, name=spec['name'])
+        # 일반 문자열 컬럼은 저장할 때 타입으로 복원 (모두 빈 칸인 컬럼은 추론에 맡기면 object가 됨)
+        # pandas 3에서 만든 번들(str)을 pandas 2에서 읽으면 CSV를 읽었을 때처럼 object로 둠
+        series = pd.Series(np.asarray(values, dtype=object), name=spec['name'])
+        if spec['dtype'] == 'string':
+            return series.astype('string')
+        return series.astype(TEXT_DTYPE) if spec['dtype'] == 'str' else series
+    if kind == 'datetime':
+        return pd.Series(arrays.pop(0).view(f"datetime64[{spec['unit']}]"), name=spec['name'])
+    if kind == 'masked':
+        values, mask = arrays.pop(0), arrays.pop(0)
+        return pd.Series(pd.array(values, dtype=spec['dtype']).copy(), name=spec['name']).mask(mask)
+    return pd.Series(arrays.pop(0), name=spec['name'])
+
+def decode_frame(spec, npz):
+    """save_bundle()로 저장한 프레임 하나 복원 (해당 프레임의 배열만 읽음)"""
+    arrays = [npz[f"a{i}"] for i in range(*spec['arrays'])]
+    df = pd.concat([decode_column(col, arrays) for col in spec['columns']], axis=1)
+    return df.set_index(spec['index']) if spec['index'] else df
+
+def save_bundle(path, data_key, ds):
+    """Dataset의 프레임, 득점 기록, 경기 흐름, 상대 전적, 미리 계산한 집계(AGGREGATES)를 정적 번들 파일 하나로 저장
+
+    선수 기록은 스냅샷과 마찬가지로 연도별 프레임("player:2025")으로 나눠 저장합니다.
+    """
+    frames = {name: getattr(ds, name) for name in BUNDLE_FRAMES}
+    frames.update({f"agg:{name}": table for name, table in build_aggregates(ds).items()})
+    partitions = partition_frames(season_rows(ds)[0])
+    # 이름 없는 인덱스는 저장하지 않으므로 원래 행 번호를 이름 붙여서 저장
+    frames.update({f"player:{name}": rows.rename_axis('row') for name, rows in partitions})
+
+    arrays, specs = [], {}
+    for name, df in frames.items():
+        index_names = [n for n in df.index.names if n is not None]
+        flat = df.reset_index() if index_names else df
+        start = len(arrays)
+        columns = [encode_column(flat[col], arrays) for col in flat.columns]
+        specs[name] = {'index': index_names, 'columns': columns, 'arrays': [start, len(arrays)]}
+    meta = {
+        'bundle_version': BUNDLE_VERSION,
+        'data_key': data_key,
+        'player_header': ds.player_header,
+        'match_header': ds.match_header,
+        'player_years': [name for name, _ in partitions[:-1]],
+        'frames': specs,
+    }
+    np.savez_compressed(
+        path, meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        **{f"a{i}": a for i, a in enumerate(arrays)},
+    )
+
+def load_bundle(path, data_key):
+    """data_key와 같은 데이터로 만든 번들이면 Dataset으로 복원 (없거나 다르면 None)"""
+    with stage("번들 로드"):
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz['meta']))
+                if meta.get('bundle_version') != BUNDLE_VERSION or meta['data_key'] != data_key:
+                    return None
+                # 연도별 선수 기록은 나중에 필요한 연도만 복원
+                frames = {
+                    name: decode_frame(spec, npz)
+                    for name, spec in meta['frames'].items() if not name.startswith("player:")
+                }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        def read_year(year):
+            with np.load(path, allow_pickle=False) as npz:
+                if json.loads(str(npz['meta']))['data_key'] != data_key:
+                    raise ValueError("번들 파일이 다른 데이터로 바뀌었습니다. 페이지를 새로 고쳐주세요.")
+                return decode_frame(meta['frames'][f"player:{year}"], npz).rename_axis(None)
+
+        aggregates = {name[4:]: df for name, df in frames.items() if name.startswith("agg:")}
+        return restore_dataset(
+            frames, SeasonPartitions(meta['player_years'], read_year),
+            meta['player_header'], meta['match_header'], aggregates,
+        )
+
+# -----------------------------------------------------------------------------
+# 조회 API (Filters -> 결과 프레임)
+# -----------------------------------------------------------------------------
+
+def filter_options(ds: Dataset, years=()) -> dict:
+    """필터바 옵션 목록 (선수명은 선택한 연도에 출전한 선수만)
+
+    사전 집계는 필터 차원 조합마다 한 행이므로 선수 기록 대신 사전 집계 색인에서 찾습니다.
+    """
+    index = ds.rollup_index
+    if years:
+        year_mask = index_mask(index, len(ds.rollup), {'연도': years})
+        players = index_values(ds.rollup, index, '선수명', year_mask)
+    else:
+        players = index_values(ds.rollup, index, '선수명')
+    return {
+        'years': sorted(index['연도'], reverse=True),
+        'tournaments': index_values(ds.rollup, index, '대회명'),
+        'opponents': index_values(ds.rollup, index, '상대팀'),
+        'players': players,
+    }
+
+def filter_players(ds: Dataset, f: Filters, with_players=True) -> pd.DataFrame:
+    """필터에 해당하는 선수 출전 기록 (연도별 파티션이면 선택한 연도만 읽음)"""
+    rows, index = season_rows(ds, f.years)
+    return rows[index_mask(index, len(rows), f.selections(with_players))]
+
+def filter_rollup(ds: Dataset, f: Filters, with_players=True) -> pd.DataFrame:
+    """필터에 해당하는 사전 집계 행 (랭킹/MOM/연도별 집계는 여기서 다시 합산)"""
+    return ds.rollup[index_mask(ds.rollup_index, len(ds.rollup), f.selections(with_players))]
+
+def match_list(ds: Dataset, f: Filters) -> pd.DataFrame:
+    """필터 조건의 선수 기록이 있는 경기 목록 (날짜순)
+
+    선수를 고르지 않았으면 선수 기록이 있는 경기(팀 흐름에 들어간 경기) 중에서
+    연도/대회/상대팀을 경기 단위로 거르므로 선수 기록을 읽지 않습니다.
+    """
+    if f.players:
+        rows, index = season_rows(ds, f.years)
+        matches = select_matches(ds.match, rows['match_id'].to_numpy()[index_mask(index, len(rows), f.selections())])
+    else:
+        keep = np.zeros(len(ds.match), dtype=bool)
+        keep[ds.team_timeline['match_id'].to_numpy()] = True
+        for col, values in f.selections(with_players=False).items():
+            if values:
+                keep &= ds.match[col].isin(values).to_numpy()
+        matches = ds.match[keep]
+    return matches.sort_values(by='날짜', ascending=True)
+
+def team_summary(ds: Dataset, f: Filters) -> dict:
+    """경기수, 승/무/패, 팀 득점/실점, 최다 MOM"""
+    team = precomputed(ds, 'team')
+    if team is not None and not f.opponents and not f.players:
+        # 연도/대회만 고른 경우 미리 계산한 연도 x 대회 성적을 합산
+        rows = team[team['연도'].isin(f.years or team['연도']) & team['대회명'].isin(f.tournaments or team['대회명'])]
+        totals = {col: int(rows[col].sum()) for col in ['경기수', '승', '무', '패', '득점', '실점']}
+    else:
+        matches = match_list(ds, f)
+        results = matches['결과']
+        totals = {
+            '경기수': len(matches),
+            '승': int((results == '승').sum()),
+            '무': int((results == '무').sum()),
+            '패': int((results == '패').sum()),
+            '득점': int(matches['팀득점'].sum()),
+            '실점': int(matches['상대득점'].sum()),
+        }
+    mom_stats = (
+        filter_rollup(ds, f, with_players=False)
+        .groupby('선수명', observed=True)['MOM'].sum()
+        .sort_values(ascending=False, kind='stable')
+    )
+    top_mom = None
+    if not mom_stats.empty and mom_stats.iloc[0] > 0:
+        top_mom = (mom_stats.index[0], int(mom_stats.iloc[0]))
+    return {**totals, '최다MOM': top_mom}
+
+def ranking(ds: Dataset, f: Filters, sort_key='득점') -> pd.DataFrame:
+    """선수 랭킹 (1부터 시작하는 순위 인덱스, 정렬 기준 컬럼이 앞쪽)"""
+    cols_order = RANK_ORDERS.get(sort_key, RANK_ORDERS['득점'])
+    rank_df = filter_rollup(ds, f, with_players=False).groupby('선수명', observed=True).agg({
+        '득점': 'sum',
+        '도움': 'sum',
+        'MOM': 'sum',
+        '출전시간': 'sum',  # 분 단위 합계
+        '경기수': 'sum',
+    }).reset_index()
+    rank_df = rank_df.sort_values(cols_order[:3], ascending=[False, False, False])
+    rank_df.index = range(1, len(rank_df) + 1)
+    return rank_df[['선수명'] + cols_order]
+
+def goal_events(ds: Dataset, f: Filters, kind='득점') -> pd.DataFrame:
+    """필터 조건 경기의 득점자(도움자) 기록 (선수명은 색인으로 조회, 날짜순)
+
+    반환 컬럼: 날짜, 대회명, 상대팀, 선수명, 횟수
+    """
+    rows = index_mask(ds.goal_index, len(ds.goal_events), {'선수명': f.players, '구분': (kind,)})
+    events = ds.goal_events[rows]
+    # 경기 조건 (연도/대회/상대팀)은 match_id 위치로 바로 확인
+    match_mask = np.ones(len(ds.match), dtype=bool)
+    for col, values in f.selections(with_players=False).items():
+        if values:
+            match_mask &= ds.match[col].isin(values).to_numpy()
+    events = events[match_mask[events['match_id'].to_numpy()]]
+    info = ds.match[['날짜', '대회명', '상대팀']].iloc[events['match_id'].to_numpy()].reset_index(drop=True)
+    return pd.concat([info, events[['선수명', '횟수']].reset_index(drop=True)], axis=1)
+
+def team_form(ds: Dataset, f: Filters, window=FORM_WINDOW) -> pd.DataFrame:
+    """경기별 최근 window경기 승점/득점/실점, 누적 득점/실점, 무패/연속 득점 기록 (날짜순)"""
+    if window == FORM_WINDOW and not any(f.selections().values()):
+        return ds.team_timeline
+    return running_stats(team_form_rows(match_list(ds, f)), None, TEAM_FORM_SUMS, TEAM_FORM_STREAKS, window)
+
+def team_streaks(ds: Dataset, f: Filters, window=FORM_WINDOW) -> dict:
+    """최근 window경기 결과/승점, 무패/연속 득점 (현재, 최장)"""
+    form = team_form(ds, f, window)
+    if form.empty:
+        return None
+    last = form.iloc[-1]
+    return {
+        '최근결과': form['결과'].tail(window).fillna('-').tolist(),
+        '최근승점': int(last['최근승점']),
+        '현재무패': int(last['무패연속']),
+        '최장무패': int(form['무패연속'].max()),
+        '현재득점연속': int(last['득점연속']),
+        '최장득점연속': int(form['득점연속'].max()),
+    }
+
+def player_form(ds: Dataset, f: Filters, window=FORM_WINDOW) -> pd.DataFrame:
+    """선택 선수(들)의 경기별 누적/최근 window경기 기록, 연속 득점, 득점당 출전시간 (날짜순)
+
+    연도/대회/상대팀 조건이 없으면 미리 계산한 통산 흐름에서 꺼내고, 있으면 해당 경기만으로 다시 계산합니다.
+    스냅샷/번들에서 읽어서 통산 흐름이 없으면 고른 선수의 전체 연도 기록으로 계산합니다.
+    """
+    if (window == FORM_WINDOW and ds.player_timeline is not None
+            and not any(f.selections(with_players=False).values())):
+        timeline = ds.player_timeline
+        rows = timeline[timeline['선수명'].isin(f.players)] if f.players else timeline
+    else:
+        rows = running_stats(
+            player_form_rows(filter_players(ds, f)), '선수명', PLAYER_FORM_SUMS, PLAYER_FORM_STREAKS, window
+        )
+    goals = rows['누적득점'].where(rows['누적득점'] > 0)
+    return rows.assign(득점당출전시간=(rows['누적출전시간'] / goals).round(1))
+
+def player_streaks(ds: Dataset, f: Filters, window=FORM_WINDOW) -> pd.DataFrame:
+    """선수별 현재 흐름 (경기수, 득점, 최근 window경기 득점, 연속 득점 현재/최장, 득점당 출전시간)"""
+    form = player_form(ds, f, window)
+    by_player = form.groupby('선수명', observed=True, sort=False)
+    last = by_player.tail(1).set_index('선수명')
+    return pd.DataFrame({
+        '경기수': last['누적경기'],
+        '득점': last['누적득점'],
+        '최근득점': last['최근득점'],
+        '연속득점': last['득점연속'],
+        '최장연속득점': by_player['득점연속'].max(),
+        '득점당출전시간': last['득점당출전시간'],
+    })
+
+def player_comparison(ds: Dataset, f: Filters) -> pd.DataFrame:
+    """선택 선수별 비교표 (출전/선발/교체/출전시간/득점/도움/실점/MOM + 90분당 환산, 선수명 인덱스)
+
+    선수 수와 관계없이 사전 집계를 선수명으로 한 번 묶어서 계산합니다.
+    """
+    table = filter_rollup(ds, f).groupby('선수명', observed=True)[COMPARE_SUMS].sum()
+    table.insert(2, '교체', table['경기수'] - table['선발'])
+    minutes = table['출전시간'].where(table['출전시간'] > 0)
+    for col in PER90_COLS:
+        table[f"{col}/90"] = (table[col] * 90 / minutes).round(2)
+    return table.sort_values(['득점', '경기수'], ascending=False, kind='stable')
+
+def player_yearly_split(ds: Dataset, f: Filters, metric='득점') -> pd.DataFrame:
+    """선수 x 연도별 지표 한 가지 (선수명 인덱스, 연도 컬럼, 출전 기록이 없는 연도는 0)"""
+    split = filter_rollup(ds, f).pivot_table(
+        index='선수명', columns='연도', values=metric, aggfunc='sum', fill_value=0, observed=True,
+    )
+    split.columns = [str(c) for c in split.columns]
+    return split
+
+def opponent_profile(ds: Dataset, opponent, top_scorers=5) -> dict | None:
+    """상대팀 전적 (대회/연도 구분 없이 통산), 미리 계산한 표에서 찾기만 함 (없으면 None)
+
+    반환값: {'전적': 통산 기록 dict, '연도별': DataFrame, '득점자': DataFrame}
+    """
+    if opponent not in ds.opponent_table.index:
+        return None
+    try:
+        scorers = ds.opponent_scorers.loc[opponent].head(top_scorers)
+    except KeyError:
+        # 상대로 넣은 득점이 없는 팀
+        scorers = ds.opponent_scorers.iloc[0:0].droplevel(0)
+    return {
+        '전적': ds.opponent_table.loc[opponent].to_dict(),
+        '연도별': ds.opponent_yearly.loc[opponent],
+        '득점자': scorers,
+    }
+
+def player_summary(ds: Dataset, f: Filters) -> dict:
+    """선택 선수(들)의 출전/선발/교체/득점/도움/실점/MOM 합계 (사전 집계에서 합산)"""
+    totals = filter_rollup(ds, f)[['경기수', '선발', '득점', '도움', '실점', 'MOM']].sum()
+    return {
+        '경기수': int(totals['경기수']),
+        '선발': int(totals['선발']),
+        '교체': int(totals['경기수'] - totals['선발']),
+        '득점': int(totals['득점']),
+        '도움': int(totals['도움']),
+        '실점': int(totals['실점']),
+        'MOM': int(totals['MOM']),
+        # 실점 기록이 있으면 골키퍼로 간주
+        '골키퍼': bool(totals['실점'] > 0),
+    }
+
+def yearly_stats(ds: Dataset, f: Filters) -> pd.DataFrame:
+    """연도별 경기수, 출전시간, 득점, 도움, 실점, MOM, 선발, 교체 (연도 오름차순)"""
+    yearly = filter_rollup(ds, f).groupby('연도', observed=True)[
+        ['경기수', '출전시간', '득점', '도움', '실점', 'MOM', '선발']
+    ].sum()
+    yearly['교체'] = yearly['경기수'] - yearly['선발']
+    return yearly.sort_index(ascending=True)
+
+def match_log(ds: Dataset, f: Filters) -> pd.DataFrame:
+    """선택 선수(들)의 경기별 출전 기록 (날짜순)"""
+    return filter_players(ds, f).sort_values(by='날짜', ascending=True)
+
+# -----------------------------------------------------------------------------
+# 조회 결과 캐시 (데이터 버전 + 정규화한 필터 + 인자 -> 결과, LRU)
+# -----------------------------------------------------------------------------
+# 필터 몇 개를 오가며 보는 경우가 많아서 같은 조합의 결과는 다시 계산하지 않습니다.
+# 결과는 여러 세션이 같은 객체를 공유하므로 받은 쪽에서 수정하지 않아야 합니다.
+
+def result_nbytes(result):
+    """캐시에 보관하는 결과의 대략적인 메모리 크기"""
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True, deep=True))
+    if isinstance(result, dict):
+        return 64 + sum(result_nbytes(v) for v in result.values())
+    return 64
+
+class QueryCache:
+    """조회 API 결과 LRU 캐시 (크기 합계가 max_bytes를 넘으면 오래 안 쓴 결과부터 제거)
+
+        cache = QueryCache()
+        cache.get(data_key, ranking, ds, f, '득점')
+        cache.invalidate(keep=new_key)  # 새 버전을 공개하면 이전 버전 결과 제거
+    """
+
+    def __init__(self, max_bytes=QUERY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (result, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, version, query, ds: Dataset, f: Filters, *args):
+        """query(ds, f, *args) 결과 (version이 None이면 캐시하지 않음)"""
+        if version is None:
+            return query(ds, f, *args)
+        key = (version, query.__name__, f.normalized(), args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # 계산은 잠금 밖에서 (다른 세션이 같은 키를 동시에 계산하면 나중 결과로 덮어씀)
+        result = query(ds, f, *args)
+        nbytes = result_nbytes(result)
+        if nbytes > self.max_bytes:
+            return result
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return result
+
+    def invalidate(self, keep=None):
+        """keep 버전이 아닌 결과를 모두 제거 (keep=None이면 전체)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] != keep]:
+                self.nbytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                '적중': self.hits,
+                '실패': self.misses,
+                '제거': self.evictions,
+                '항목': len(self._entries),
+                '크기(KB)': round(self.nbytes / 1024, 1),
+            }
+
+# -----------------------------------------------------------------------------
+# 표 내보내기 (CSV / Parquet / Excel)
+# -----------------------------------------------------------------------------
+# 조회 결과(캐시된 프레임)를 EXPORT_CHUNK_ROWS행씩 잘라서 씁니다. 화면 표시용으로 바꾼 문자열 대신
+# 원래 값(날짜, 숫자)을 그대로 쓰고, 전체 출전 기록처럼 긴 표도 변환 중 복사본은 한 조각만 만듭니다.
+# 결과 프레임은 읽기만 하므로 잠금 없이 여러 세션이 동시에 내보낼 수 있습니다.
+
+def export_formats():
+    """이 환경에서 쓸 수 있는 내보내기 형식 (pyarrow / openpyxl이 없으면 해당 형식 제외)"""
+    return [name for name, (_, _, module) in EXPORT_FORMATS.items()
+            if module is None or importlib.util.find_spec(module) is not None]
+
+def export_chunks(df, columns=None, index=False, chunk_rows=EXPORT_CHUNK_ROWS):
+    """columns 컬럼만 chunk_rows행씩 나눈 조각 (index=True면 인덱스를 컬럼으로 꺼냄), 빈 표도 한 조각"""
+    columns = list(df.columns) if columns is None else [c for c in columns if c in df.columns]
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows][columns]
+        yield chunk.reset_index() if index else chunk
+
+def write_csv_chunks(chunks, out):
+    text = io.TextIOWrapper(out, encoding=EXPORT_ENCODING, newline="")
+    for n, chunk in enumerate(chunks):
+        chunk.to_csv(text, index=False, header=n == 0)
+    text.flush()
+    text.detach()  # out은 닫지 않음
+
+def write_parquet_chunks(chunks, out):
+    """조각마다 row group 하나 (스키마는 첫 조각 기준, 이후 조각은 같은 타입으로 변환)
+
+    object 컬럼(pandas 2의 글자 컬럼)은 조각마다 값으로 타입을 추론하므로 문자열로 바꿔서 씁니다.
+    (첫 조각이 전부 빈 칸이면 null 타입이 되어 뒤 조각을 쓸 수 없음)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    for chunk in chunks:
+        text = {col: 'string' for col in chunk.columns if chunk[col].dtype == object}
+        if text:
+            chunk = chunk.astype(text)
+        if writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(out, schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    writer.close()
+
+def write_xlsx_chunks(chunks, out, sheet_name):
+    """openpyxl write-only 모드 (셀 객체를 메모리에 쌓지 않고 행 단위로 기록)
+
+    경기 날짜에는 시각이 없으므로 날짜 컬럼은 날짜 셀(yyyy-mm-dd)로 씁니다.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name[:31])  # 엑셀 시트 이름 최대 길이
+    for n, chunk in enumerate(chunks):
+        if n == 0:
+            ws.append([str(col) for col in chunk.columns])
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for col in chunk.columns[[pd.api.types.is_datetime64_any_dtype(t) for t in chunk.dtypes]]:
+            values[col] = chunk[col].dt.date.where(chunk[col].notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(out)
+
+def export_table(df, fmt, out, columns=None, index=False, sheet_name="기록"):
+    """df를 fmt 형식(EXPORT_FORMATS)으로 out(바이너리 파일 객체)에 조각 단위로 기록"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식: {fmt}")
+    chunks = export_chunks(df, columns, index)
+    with stage(f"{fmt} 내보내기"):
+        if fmt == 'CSV':
+            write_csv_chunks(chunks, out)
+        elif fmt == 'Parquet':
+            write_parquet_chunks(chunks, out)
+        else:
+            write_xlsx_chunks(chunks, out, sheet_name)
+    return out
+
+# -----------------------------------------------------------------------------
+# 일괄 리포트용 집계 (전체 데이터 한 번 순회)
+# -----------------------------------------------------------------------------
+
+def precomputed(ds: Dataset, name):
+    """번들에서 읽은 미리 계산된 집계 (없으면 None)"""
+    if ds.aggregates is None or name not in ds.aggregates:
+        return None
+    return ds.aggregates[name].copy()
+
+def team_table(ds: Dataset) -> pd.DataFrame:
+    """연도 x 대회별 팀 성적 (선수 기록이 있는 경기만 집계, team_summary와 같은 기준)"""
+    table = precomputed(ds, 'team')
+    if table is not None:
+        return table
+    return result_counts(match_list(ds, Filters())).groupby(['연도', '대회명'], observed=True).agg(
+        경기수=('match_id', 'size'),
+        승=('승', 'sum'),
+        무=('무', 'sum'),
+        패=('패', 'sum'),
+        득점=('팀득점', 'sum'),
+        실점=('상대득점', 'sum'),
+    ).reset_index()
+
+def season_table(ds: Dataset) -> pd.DataFrame:
+    """연도별 팀 성적 (경기수, 승/무/패, 득점/실점, 승부차기 경기수)"""
+    table = precomputed(ds, 'season')
+    if table is not None:
+        return table
+    m = result_counts(ds.match)
+    table = m.assign(승부차기경기=m['승부차기'].astype(int)).groupby('연도').agg(
+        경기수=('match_id', 'size'),
+        승=('승', 'sum'),
+        무=('무', 'sum'),
+        패=('패', 'sum'),
+        득점=('팀득점', 'sum'),
+        실점=('상대득점', 'sum'),
+        승부차기=('승부차기경기', 'sum'),
+    )
+    return table.sort_index()
+
+def player_yearly_table(ds: Dataset) -> pd.DataFrame:
+    """선수 x 연도별 누적 기록"""
+    table = precomputed(ds, 'player_yearly')
+    if table is not None:
+        return table
+    table = ds.rollup.groupby(['선수명', '연도'], observed=True)[
+        ['경기수', '선발', '출전시간', '득점', '도움', '실점', 'MOM']
+    ].sum()
+    table['교체'] = table['경기수'] - table['선발']
+    return table.reset_index()
+
+def player_career_table(ds: Dataset) -> pd.DataFrame:
+    """선수별 통산 기록 (득점 많은 순)"""
+    table = precomputed(ds, 'player_career')
+    if table is not None:
+        return table
+    table = ds.rollup.groupby('선수명', observed=True)[
+        ['경기수', '선발', '출전시간', '득점', '도움', '실점', 'MOM']
+    ].sum()
+    table['교체'] = table['경기수'] - table['선발']
+    return table.sort_values(['득점', '경기수'], ascending=False, kind='stable').reset_index()
+
+# 정적 번들에 미리 계산해서 넣어두는 집계
+AGGREGATES = {
+    'team': team_table,
+    'season': season_table,
+    'player_yearly': player_yearly_table,
+    'player_career': player_career_table,
+}
+
+def build_aggregates(ds: Dataset) -> dict:
+    return {name: build(ds) for name, build in AGGREGATES.items()}
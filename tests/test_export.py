@@ -0,0 +1,82 @@
+"""표 내보내기(export_table)가 조각 단위로 써도 원래 값을 그대로 담는지 확인
+
+    python -m pytest -q tests
+"""
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import stats_engine as engine  # noqa: E402
+
+ROWS = engine.EXPORT_CHUNK_ROWS * 2 + 400
+
+
+@pytest.fixture(scope="module")
+def table():
+    """날짜(NaT 포함), category, nullable 정수, 첫 조각이 전부 빈 칸인 object 컬럼"""
+    n = np.arange(ROWS)
+    df = pd.DataFrame({
+        '날짜': pd.Timestamp('2024-01-01') + pd.to_timedelta(n % 400, unit='D'),
+        '선수명': pd.Categorical(np.where(n % 3, '김장우', '현대호')),
+        '팀득점': pd.array([pd.NA if i % 7 == 0 else i % 5 for i in n], dtype='Int64'),
+        '비고': pd.Series([None] * (engine.EXPORT_CHUNK_ROWS + 100) + ['PSO'] * (ROWS - engine.EXPORT_CHUNK_ROWS - 100), dtype=object),
+        '출전시간': (n % 96).astype('int16'),
+    })
+    df.loc[3, '날짜'] = pd.NaT
+    return df
+
+
+def read_back(fmt, out):
+    out.seek(0)
+    if fmt == 'CSV':
+        return pd.read_csv(out, encoding=engine.EXPORT_ENCODING)
+    if fmt == 'Parquet':
+        return pd.read_parquet(out)
+    return pd.read_excel(out)
+
+
+@pytest.mark.parametrize("fmt", list(engine.EXPORT_FORMATS))
+def test_export_round_trip(fmt, table):
+    module = engine.EXPORT_FORMATS[fmt][2]
+    if module:
+        pytest.importorskip(module)
+    back = read_back(fmt, engine.export_table(table, fmt, io.BytesIO()))
+
+    assert list(back.columns) == list(table.columns)
+    assert len(back) == len(table)
+    dates = pd.to_datetime(back['날짜'])
+    assert dates.isna().sum() == 1
+    assert (dates.dropna().dt.normalize().to_numpy() == table['날짜'].dropna().to_numpy()).all()
+    assert (back['선수명'].astype(str) == table['선수명'].astype(str)).all()
+    assert back['팀득점'].isna().sum() == table['팀득점'].isna().sum()
+    assert (back['팀득점'].dropna().astype(int).to_numpy() == table['팀득점'].dropna().astype(int).to_numpy()).all()
+    assert back['비고'].notna().sum() == table['비고'].notna().sum()
+    assert (back['출전시간'].to_numpy() == table['출전시간'].to_numpy()).all()
+
+
+@pytest.mark.parametrize("fmt", ['CSV', 'Parquet'])
+def test_export_columns_and_index(fmt, table):
+    pytest.importorskip('pyarrow')
+    ranked = table.iloc[:10].rename_axis('순위')
+    back = read_back(fmt, engine.export_table(ranked, fmt, io.BytesIO(), ['선수명', '없는컬럼'], index=True))
+    assert list(back.columns) == ['순위', '선수명']
+    assert back['순위'].tolist() == list(range(10))
+
+    empty = read_back(fmt, engine.export_table(table.iloc[0:0], fmt, io.BytesIO()))
+    assert list(empty.columns) == list(table.columns) and empty.empty
+
+
+def test_xlsx_cells(table):
+    openpyxl = pytest.importorskip('openpyxl')
+    out = engine.export_table(table.iloc[:5], 'Excel', io.BytesIO(), sheet_name='Match Log')
+    ws = openpyxl.load_workbook(out).active
+    assert ws.title == 'Match Log'
+    assert [c.value for c in ws[1]] == list(table.columns)
+    assert ws['A2'].number_format == 'yyyy-mm-dd'
+    assert ws['C2'].value is None and ws['C3'].value == 1
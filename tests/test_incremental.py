@@ -0,0 +1,155 @@
+"""증분 업데이트(apply_changes) 결과가 전체 다시 읽기와 같은지 확인 (gen_data 가상 데이터)
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import gen_data  # noqa: E402
+import stats_engine as engine  # noqa: E402
+from stats_engine import Filters  # noqa: E402
+
+# 행 순서와 무관하게 비교할 프레임 (정렬 기준 컬럼)
+FRAME_KEYS = {
+    'player': ['행'],
+    'match': ['행'],
+    'rollup': engine.ROLLUP_KEYS,
+    'validation': ['표', '행', '컬럼', '문제'],
+    'goal_events': ['match_id', '구분', '선수명'],
+    'team_timeline': ['match_id'],
+    'player_timeline': ['선수명', 'match_id'],
+}
+INDEXED_FRAMES = ['opponent_table', 'opponent_yearly', 'opponent_scorers']
+
+
+def csv_text(columns, rows):
+    lines = [",".join(columns)]
+    for row in rows:
+        lines.append(",".join(f'"{v}"' if "," in str(v) or "\n" in str(v) else str(v) for v in row))
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture(scope="module")
+def base_rows():
+    match_rows, player_rows = gen_data.generate(scale=2, seed=1)
+    return match_rows, player_rows
+
+
+def load(match_rows, player_rows, base=None):
+    return engine.load_csv_text(
+        csv_text(gen_data.PLAYER_COLUMNS, player_rows), csv_text(gen_data.MATCH_COLUMNS, match_rows), base,
+    )
+
+
+def normalized(df, keys):
+    """match_id는 경기 날짜순 번호라서 같은 데이터면 같은 값, 행 순서만 맞춤"""
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df.sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def assert_same_dataset(incremental, full):
+    for name, keys in FRAME_KEYS.items():
+        pd.testing.assert_frame_equal(
+            normalized(getattr(incremental, name), keys), normalized(getattr(full, name), keys), obj=name,
+        )
+    for name in INDEXED_FRAMES:
+        pd.testing.assert_frame_equal(getattr(incremental, name), getattr(full, name), obj=name)
+
+    years = sorted(full.player_index['연도'])
+    players = tuple(engine.player_career_table(full)['선수명'][:3])
+    for f in (Filters(), Filters(years=(years[-1],)), Filters(players=players)):
+        pd.testing.assert_frame_equal(
+            engine.match_list(incremental, f).reset_index(drop=True), engine.match_list(full, f).reset_index(drop=True),
+        )
+        pd.testing.assert_frame_equal(
+            normalized(engine.match_log(incremental, f), ['행']), normalized(engine.match_log(full, f), ['행']),
+        )
+        assert engine.team_summary(incremental, f) == engine.team_summary(full, f)
+        pd.testing.assert_frame_equal(engine.ranking(incremental, f, '득점'), engine.ranking(full, f, '득점'))
+
+
+def edits(match_rows, player_rows):
+    """수정/삭제/추가를 섞은 새 행 목록 (앞쪽 날짜 경기 추가, 숫자로 보이는 라운드 포함)"""
+    match_rows = [list(r) for r in match_rows]
+    player_rows = [list(r) for r in player_rows]
+    first = match_rows[0]
+
+    # 첫 경기보다 앞선 날짜에 라운드가 "1"인 경기와 출전 기록 추가
+    day = str(pd.Timestamp(first[3]) - pd.Timedelta(days=1))[:10]
+    match_rows.insert(0, [first[0], first[1], "1", day, "테스트대", "2:0", "김테스트(2)", "", "김테스트", "", ""])
+    player_rows.insert(0, [first[0], first[1], "1", day, "테스트대", "김테스트", "선발", 90, 2, "", "", 1, "", ""])
+    player_rows.insert(1, [first[0], first[1], "1", day, "테스트대", player_rows[5][5], "교체", 30, "", "", "", "", "", ""])
+
+    # 기존 경기 스코어/비고 수정 (선수 기록은 그대로)
+    match_rows[5][5] = "0:0"
+    match_rows[5][10] = "우천"
+    # 출전 기록 하나 수정, 하나 삭제
+    player_rows[10][8] = 3
+    del player_rows[20]
+    return match_rows, player_rows
+
+
+def test_incremental_matches_full_reload(base_rows):
+    match_rows, player_rows = base_rows
+    base = load(match_rows, player_rows)
+    new_match, new_player = edits(match_rows, player_rows)
+
+    incremental = load(new_match, new_player, base)
+    assert incremental.changes is not None
+    full = load(new_match, new_player)
+    assert (incremental.player['match_id'] >= 0).all()
+    assert_same_dataset(incremental, full)
+
+
+def test_incremental_from_snapshot_matches_full_reload(base_rows, tmp_path):
+    match_rows, player_rows = base_rows
+    player_csv = csv_text(gen_data.PLAYER_COLUMNS, player_rows)
+    match_csv = csv_text(gen_data.MATCH_COLUMNS, match_rows)
+    data_key = engine.csv_digest(player_csv, match_csv)
+    engine.save_snapshot(str(tmp_path), data_key, engine.load_csv_text(player_csv, match_csv))
+    base = engine.load_snapshot(str(tmp_path), data_key)
+    assert base.seasons is not None
+
+    new_match, new_player = edits(match_rows, player_rows)
+    incremental = load(new_match, new_player, base)
+    full = load(new_match, new_player)
+    pd.testing.assert_frame_equal(
+        normalized(engine.season_rows(incremental)[0], ['행']), normalized(full.player, ['행']),
+    )
+    assert_same_dataset(incremental, full)
+
+
+def test_first_player_rows_over_empty_snapshot(base_rows, tmp_path):
+    match_rows, player_rows = base_rows
+    header = ",".join(gen_data.PLAYER_COLUMNS) + "\n"
+    match_csv = csv_text(gen_data.MATCH_COLUMNS, match_rows)
+    data_key = engine.csv_digest(header, match_csv)
+    engine.save_snapshot(str(tmp_path), data_key, engine.load_csv_text(header, match_csv))
+    base = engine.load_snapshot(str(tmp_path), data_key)
+    assert engine.match_log(base, Filters(players=('김테스트',))).empty
+
+    incremental = load(match_rows, player_rows, base)
+    full = load(match_rows, player_rows)
+    assert_same_dataset(incremental, full)
+
+
+def test_multiline_cell_falls_back_to_full_reload(base_rows):
+    """따옴표 안 줄바꿈(엑셀 Alt+Enter)이 있는 칸을 붙여넣으면 증분 대신 전체 다시 읽기"""
+    match_rows, player_rows = base_rows
+    base = load(match_rows, player_rows)
+    new_match, new_player = edits(match_rows, player_rows)
+    new_match[5][10] = "우천\n다음 주 재경기"
+
+    incremental = load(new_match, new_player, base)
+    full = load(new_match, new_player)
+    assert incremental.changes is None
+    assert (incremental.match['비고'] == "우천\n다음 주 재경기").sum() == 1
+    assert_same_dataset(incremental, full)
@@ -0,0 +1,128 @@
+"""스냅샷 저장 -> 읽기 결과가 CSV에서 바로 만든 Dataset과 같은지 확인 (gen_data 가상 데이터)
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import gen_data  # noqa: E402
+import stats_engine as engine  # noqa: E402
+from stats_engine import Filters  # noqa: E402
+from test_incremental import csv_text  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def base_rows():
+    match_rows, player_rows = gen_data.generate(scale=1, seed=2)
+    return match_rows, player_rows
+
+
+def snapshot_round_trip(tmp_path, player_csv, match_csv):
+    data_key = engine.csv_digest(player_csv, match_csv)
+    full = engine.load_csv_text(player_csv, match_csv)
+    engine.save_snapshot(str(tmp_path), data_key, full)
+    restored = engine.load_snapshot(str(tmp_path), data_key)
+    assert restored is not None and restored.seasons is not None
+    return restored, full
+
+
+def assert_same_frames(restored, full):
+    for name in engine.SNAPSHOT_FRAMES:
+        pd.testing.assert_frame_equal(getattr(restored, name), getattr(full, name), obj=name)
+
+
+def test_snapshot_round_trip(base_rows, tmp_path):
+    match_rows, player_rows = base_rows
+    restored, full = snapshot_round_trip(
+        tmp_path, csv_text(gen_data.PLAYER_COLUMNS, player_rows), csv_text(gen_data.MATCH_COLUMNS, match_rows),
+    )
+    assert_same_frames(restored, full)
+    assert restored.player_timeline is None
+    players = tuple(engine.player_career_table(full)['선수명'][:2])
+    for f in (Filters(), Filters(players=players)):
+        assert engine.goal_events(restored, f).equals(engine.goal_events(full, f))
+        # 선수별 경기 흐름은 저장하지 않고 연도별 기록에서 계산 (미리 계산한 흐름과 같아야 함)
+        pd.testing.assert_frame_equal(
+            engine.player_form(restored, f).reset_index(drop=True), engine.player_form(full, f).reset_index(drop=True),
+        )
+        pd.testing.assert_frame_equal(engine.player_streaks(restored, f), engine.player_streaks(full, f))
+
+
+def test_snapshot_without_event_columns(base_rows, tmp_path):
+    """득점자/도움자 칸이 없는 경기기록: 빈 득점 기록 표도 category 컬럼으로 복원"""
+    match_rows, player_rows = base_rows
+    columns = [col for col in gen_data.MATCH_COLUMNS if col not in engine.EVENT_COLS]
+    keep = [i for i, col in enumerate(gen_data.MATCH_COLUMNS) if col in columns]
+    restored, full = snapshot_round_trip(
+        tmp_path, csv_text(gen_data.PLAYER_COLUMNS, player_rows),
+        csv_text(columns, [[row[i] for i in keep] for row in match_rows]),
+    )
+    assert restored.goal_events.empty
+    assert_same_frames(restored, full)
+    assert engine.goal_events(restored, Filters()).empty
+
+
+def test_snapshot_header_only_matches(tmp_path):
+    restored, full = snapshot_round_trip(
+        tmp_path, ",".join(gen_data.PLAYER_COLUMNS) + "\n", ",".join(gen_data.MATCH_COLUMNS) + "\n",
+    )
+    # 빈 날짜 컬럼은 Parquet에 초 단위가 없어 시간 단위만 다르므로 category 컬럼만 비교
+    for name in engine.SNAPSHOT_FRAMES:
+        assert engine.category_columns(getattr(restored, name)) == engine.category_columns(getattr(full, name)), name
+    assert engine.match_list(restored, Filters()).empty
+    assert engine.goal_events(restored, Filters()).empty
+
+
+def test_broken_snapshot_is_discarded(base_rows, tmp_path):
+    """복원하다 실패하는 스냅샷은 None (CSV로 다시 읽음) + 지워서 다시 저장할 수 있게 함"""
+    match_rows, player_rows = base_rows
+    player_csv = csv_text(gen_data.PLAYER_COLUMNS, player_rows)
+    match_csv = csv_text(gen_data.MATCH_COLUMNS, match_rows)
+    restored, full = snapshot_round_trip(tmp_path, player_csv, match_csv)
+    data_key = engine.csv_digest(player_csv, match_csv)
+    pd.DataFrame({'x': [1]}).to_parquet(tmp_path / data_key[:16] / "goal_events.parquet")
+
+    assert engine.load_snapshot(str(tmp_path), data_key) is None
+    assert not (tmp_path / data_key[:16]).exists()
+    engine.save_snapshot(str(tmp_path), data_key, full)
+    assert_same_frames(engine.load_snapshot(str(tmp_path), data_key), full)
+
+
+def test_current_version_points_to_published_csv(tmp_path):
+    """CURRENT_FILE에는 data_key와 CSV 파일 이름만 기록, 새 버전을 공개하면 이전 CSV는 정리"""
+    assert engine.load_current(str(tmp_path)) is None
+    old_key = engine.csv_digest("a\n", "b\n")
+    engine.save_current(str(tmp_path), old_key, "a\n", "b\n")
+
+    new_key = engine.csv_digest("a\n1\n", "b\n2\n")
+    paths = engine.save_current(str(tmp_path), new_key, "a\n1\n", "b\n2\n")
+    assert engine.load_current(str(tmp_path)) == (new_key,) + paths
+    assert [open(path, encoding="utf-8").read() for path in paths] == ["a\n1\n", "b\n2\n"]
+    assert sorted(os.listdir(tmp_path)) == sorted([engine.CURRENT_FILE] + [os.path.basename(p) for p in paths])
+
+    os.remove(paths[1])
+    assert engine.load_current(str(tmp_path)) is None
+
+
+def test_bundle_round_trip_keeps_text_dtypes(base_rows, tmp_path):
+    """값이 모두 빈 칸인 글자 컬럼(도움자)도 CSV에서 읽었을 때와 같은 타입으로 복원"""
+    match_rows, player_rows = base_rows
+    assist = gen_data.MATCH_COLUMNS.index('도움자')
+    match_rows = [row[:assist] + [""] + row[assist + 1:] for row in match_rows]
+    player_csv = csv_text(gen_data.PLAYER_COLUMNS, player_rows)
+    match_csv = csv_text(gen_data.MATCH_COLUMNS, match_rows)
+    data_key = engine.csv_digest(player_csv, match_csv)
+    full = engine.load_csv_text(player_csv, match_csv)
+    engine.save_bundle(str(tmp_path / "bundle.npz"), data_key, full)
+    restored = engine.load_bundle(str(tmp_path / "bundle.npz"), data_key)
+
+    assert restored.match['도움자'].isna().all()
+    for name in engine.BUNDLE_FRAMES:
+        df = getattr(full, name)
+        assert getattr(restored, name).dtypes.to_dict() == df.dtypes.to_dict(), name
+    pd.testing.assert_series_equal(engine.season_rows(restored)[0].dtypes, full.player.dtypes)